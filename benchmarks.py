@@ -0,0 +1,214 @@
+import sys
+import os
+import time
+import json
+import random
+import platform
+import tracemalloc
+
+import numpy as np
+import sympy
+from sympy import eye, MatrixBase
+
+sys.path.append(os.path.dirname(__file__))
+from search import *
+import cache
+import polydet
+import sparsedet
+from laurent import LaurentPoly
+
+
+def _twisted_candidates(knot_n_function, n=11):
+    for i in range(5, n, 2):
+        for i_dis in range(n - i + 1):
+            knot = Braid()
+            for twist, displacement in zip([n, -n + 2, -i, i], [0, 2, i_dis, 0]):
+                knot = knot * (empty(displacement) + full_twist(twist))
+            yield ([n, -n + 2, -i, i], [0, 2, i_dis, 0]), knot * knot_n_function(n)
+
+
+def bench_super_simplify(knot_n_function, n=11):
+    """
+    Times Braid.super_simplify on unsimplified twisted_braid candidates.
+    :param knot_n_function: family of knots, such as figeight or tref
+    :param n: number of strands
+    :return: list of (parameters, length before, length after, seconds)
+    """
+    results = []
+    for parameters, knot in _twisted_candidates(knot_n_function, n):
+        start = time.perf_counter()
+        simplified = knot.super_simplify()
+        results += [(parameters, len(knot), len(simplified), time.perf_counter() - start)]
+    return results
+
+
+def bench_poly_det(braids, sympy_det=True):
+    """
+    Times polydet.calculate_poly_det against Matrix.det() on I - B(t), B the reduced Burau matrix, as in
+    invariants.burau_to_alexander.
+    :param braids: braids on at least two strands
+    :param sympy_det: also time Matrix.det(), which is very slow beyond a few strands
+    :return: list of (strands, length, polydet seconds, Matrix.det seconds or None)
+    """
+    results = []
+    for braid in braids:
+        matrix = eye(braid.n_strands - 1) - braid.burau_rep()
+        start = time.perf_counter()
+        polydet.calculate_poly_det(matrix)
+        poly_seconds = time.perf_counter() - start
+        sympy_seconds = None
+        if sympy_det:
+            start = time.perf_counter()
+            matrix.det()
+            sympy_seconds = time.perf_counter() - start
+        results += [(braid.n_strands, len(braid), poly_seconds, sympy_seconds)]
+    return results
+
+
+def random_braid(n_strands, length, seed=0):
+    """
+    :return: braid of length random generators and inverses on n_strands strands, the same for the same seed
+    """
+    rng = random.Random("{}-{}-{}".format(n_strands, length, seed))
+    return Braid([rng.choice((-1, 1)) * rng.randrange(1, n_strands) for _ in range(length)], n_strands=n_strands)
+
+
+def braid_suite(strands=(7, 9, 11), lengths=(25, 100, 400), seed=0):
+    """
+    Braids of the benchmark suite, the DV, figeight and tref families and a twisted_braid candidate of each on
+    every number of strands, and random braids on every number of strands and of every length.
+    :return: generator of (label, braid)
+    """
+    for n in strands:
+        for family in (DV, figeight, tref):
+            yield "{}({})".format(family.__name__, n), family(n)
+        for family in (figeight, tref):
+            twists, displacements = [n, -n + 2, -5, 5], [0, 2, 1, 0]
+            yield "twisted_braid({}, {}, {}, {})".format(twists, displacements, family.__name__, n), \
+                twisted_braid(twists, displacements, family, n)
+        for length in lengths:
+            yield "random_braid({}, {}, {})".format(n, length, seed), random_braid(n, length, seed)
+
+
+# stages of the benchmark, each a function of the braid
+STAGES = {
+    "simplify": lambda braid: braid.simplify(),
+    "super_simplify": lambda braid: braid.super_simplify(),
+    "seifert_matrix": lambda braid: braid.seifert_matrix(),
+    "signature": lambda braid: braid.signature(),
+    "burau_rep": lambda braid: braid.burau_rep(),
+    "alexander_burau": lambda braid: braid.alexander_poly(method="burau"),
+    "alexander_seifert": lambda braid: braid.alexander_poly(method="seifert"),
+    "alexander_interp": lambda braid: braid.alexander_poly(method="interp"),
+}
+
+
+def _size(value):
+    """
+    Size of the result of a stage, the length of a braid, shape and number of non zero entries of a matrix, or
+    degree of a polynomial.
+    """
+    if isinstance(value, Braid):
+        return {"length": len(value)}
+    if isinstance(value, sparsedet.SparseMatrix):
+        return {"shape": list(value.shape), "non_zero": len(value.index_value_dict())}
+    if isinstance(value, MatrixBase):
+        return {"shape": list(value.shape), "non_zero": sum(1 for entry in value if entry != 0)}
+    if isinstance(value, (sympy.Poly, LaurentPoly)):
+        return {"degree": value.degree()}
+    return {}
+
+
+def bench_stages(braids, stages=None, repeat=3, memory=True):
+    """
+    Times each stage on each braid with the invariant cache disabled, so every stage is computed from scratch, on a
+    new copy of the braid for each run.
+    :param braids: iterable of (label, braid), such as braid_suite()
+    :param stages: names of stages in STAGES, all if None
+    :param repeat: number of timed runs, the fastest is kept
+    :param memory: also measure peak memory with tracemalloc, in a separate untimed run
+    :return: list of records with the braid label, strands, length, stage, seconds, peak bytes (None without
+    memory) and the size of the result
+    """
+    stages = list(STAGES) if stages is None else stages
+    previous_cache = cache.default_cache
+    cache.configure(maxsize=0)
+    records = []
+    try:
+        for label, braid in braids:
+            for stage in stages:
+                function = STAGES[stage]
+                seconds = float("inf")
+                for _ in range(repeat):
+                    # a fresh copy each run, so nothing memoised on the braid, such as its Garside key, is reused
+                    fresh = braid[:]
+                    start = time.perf_counter()
+                    value = function(fresh)
+                    seconds = min(seconds, time.perf_counter() - start)
+                peak = None
+                if memory:
+                    fresh = braid[:]
+                    tracemalloc.start()
+                    function(fresh)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                records += [{"braid": label, "strands": braid.n_strands, "length": len(braid), "stage": stage,
+                             "seconds": seconds, "peak_bytes": peak, "size": _size(value)}]
+    finally:
+        cache.default_cache = previous_cache
+    return records
+
+
+def run_suite(output=None, strands=(7, 9, 11), lengths=(25, 100, 400), seed=0, stages=None, repeat=3,
+              memory=True):
+    """
+    Runs bench_stages on braid_suite and writes the records as JSON, with the versions they were measured on.
+    :param output: path of the JSON file, or None to only return the results
+    :return: dictionary with "meta" and "results"
+    """
+    report = {"meta": {"python": platform.python_version(), "numpy": np.__version__, "sympy": sympy.__version__,
+                       "machine": platform.machine(), "strands": list(strands), "lengths": list(lengths),
+                       "seed": seed, "repeat": repeat},
+              "results": bench_stages(braid_suite(strands, lengths, seed), stages, repeat, memory)}
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=1)
+    return report
+
+
+def compare(baseline, current, tolerance=1.25):
+    """
+    Stages slower than in a baseline run of run_suite.
+    :param baseline: report or path of its JSON file
+    :param current: report or path of its JSON file
+    :param tolerance: ratio of times below which a stage is not reported
+    :return: list of (braid, stage, baseline seconds, current seconds), slowest ratio first
+    """
+    reports = []
+    for report in (baseline, current):
+        if isinstance(report, str):
+            with open(report) as file:
+                report = json.load(file)
+        reports += [{(record["braid"], record["stage"]): record["seconds"] for record in report["results"]}]
+    baseline, current = reports
+    slower = [(braid, stage, baseline[braid, stage], seconds) for (braid, stage), seconds in current.items()
+              if (braid, stage) in baseline and seconds > tolerance * baseline[braid, stage]]
+    return sorted(slower, key=lambda row: row[2] / row[3])
+
+
+if __name__ == "__main__":
+    # python benchmarks.py output.json [baseline.json] runs the suite, and reports regressions against a baseline
+    if len(sys.argv) > 1:
+        run_suite(sys.argv[1])
+        if len(sys.argv) > 2:
+            for braid, stage, before, after in compare(sys.argv[2], sys.argv[1]):
+                print("{} {}: {:.4f}s -> {:.4f}s".format(braid, stage, before, after))
+        sys.exit()
+
+    for family in [figeight, tref]:
+        for parameters, before, after, seconds in bench_super_simplify(family):
+            print(family.__name__, parameters, before, "->", after, "letters in {:.4f}s".format(seconds))
+
+    for strands, length, poly_seconds, sympy_seconds in bench_poly_det([figeight(6), tref(7)]):
+        print("I - B(t) on", strands, "strands,", length, "letters: polydet {:.4f}s, Matrix.det {:.4f}s".format(
+            poly_seconds, sympy_seconds))
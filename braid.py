@@ -1,10 +1,33 @@
-
 import sys
 import os
+from array import array
+from itertools import compress
 
 sys.path.append(os.path.dirname(__file__))
 
+import cache
+import garside
+import handles
+import instrument
 import invariants
+import wordexpr
+
+# braid words are stored as signed 16 bit generators, which allows up to 32767 strands
+_TYPECODE = "h"
+# braid strings such as {1;-2;3} or 1, -2, 3 become 1,-2,3 in one pass
+_STRING_TABLE = str.maketrans(";", ",", "{} \t\r\n")
+
+
+def parse_word(braid_string):
+    """
+    :param braid_string: generators separated by ; or , optionally in braces, as written by Braid.__str__
+    :return: the generators as an array, empty for an empty string
+    """
+    braid_string = braid_string.translate(_STRING_TABLE)
+    if not braid_string:
+        return array(_TYPECODE)
+    return array(_TYPECODE, map(int, braid_string.split(",")))
+
 
 class Braid:
     def __init__(self, braid_list=None, n_strands=None):
@@ -14,35 +37,89 @@ class Braid:
                                               "unless using Braid.from_string")
         assert all(isinstance(generator, int) for generator in braid_list)
         assert all(generator != 0 for generator in braid_list)
-        self._braid_list = braid_list
+        self._word = array(_TYPECODE, braid_list)
 
         if n_strands is None:
             n_strands = self.max_generator() + 1
         self.n_strands = n_strands
 
+    @classmethod
+    def _from_word(cls, word, n_strands):
+        """
+        Trusted constructor, wraps an existing array of generators without copying or validating it.
+        :param word: array.array of non zero generators, all smaller in absolute value than n_strands
+        :param n_strands: number of strands of the braid
+        :return: a braid backed by word
+        """
+        braid = cls.__new__(cls)
+        # the attributes behind the _word property, set directly as this is the constructor of bulk loading
+        braid._array = word
+        braid._expression = None
+        braid._shared = False
+        braid._n_strands = n_strands
+        braid._key = None
+        return braid
+
+    @classmethod
+    def _from_expression(cls, expression, n_strands):
+        """
+        Braid whose word is only built from the lazy expression when it is first needed, see wordexpr.
+        """
+        braid = cls.__new__(cls)
+        braid._array = None
+        braid._expression = expression
+        braid._shared = True
+        braid._n_strands = n_strands
+        braid._key = None
+        return braid
+
+    @property
+    def _word(self):
+        if self._array is None:
+            self._array = self._expression.flatten()
+        return self._array
+
+    @_word.setter
+    def _word(self, word):
+        self._array = word
+        self._expression = None
+        self._shared = False
+
+    def expression(self):
+        """
+        :return: the braid word as a wordexpr.Node, which shares the word of this braid
+        """
+        if self._expression is None:
+            self._expression = wordexpr.Word(self._array)
+            self._shared = True
+        return self._expression
+
     def max_generator(self):
-        if self._braid_list == []:
+        if self._expression is not None:
+            return self._expression.max_generator
+        if len(self._word) == 0:
             max_gen = -1
         else:
-            max_gen = max([abs(gen) for gen in self._braid_list])
+            max_gen = max(max(self._word), -min(self._word))
         return max_gen
 
+    def exponent_sum(self):
+        return self.expression().exponent_sum()
+
     @classmethod
     def from_string(cls, braid_string, n_strands=None):
-        braid_string = braid_string.replace(";", ",")
-        braid_string = braid_string.replace("{", "")
-        braid_string = braid_string.replace("}", "")
-        braid_string = braid_string.replace(" ", "")
-        braid_list = braid_string.split(",")
-        braid_list = [int(gen) for gen in braid_list]
-        return cls(braid_list, n_strands)
+        word = parse_word(braid_string)
+        assert 0 not in word
+        braid = cls._from_word(word, 0)
+        braid.n_strands = braid.max_generator() + 1 if n_strands is None else n_strands
+        return braid
 
     @classmethod
     def empty(cls, n_strands):
         return cls(n_strands=n_strands)
 
     def __str__(self):
-        return ";".join([str(generator) for generator in self._braid_list])
+        return ";".join([str(generator) for generator in self._word])
 
     @property
     def n_strands(self):
@@ -54,61 +131,99 @@ class Braid:
         assert n > self.max_generator(), (f"{n} strands not enough for braid " +
                                           f"on {self.max_generator()} generators")
         self._n_strands = n
+        self._key = None
 
     def __repr__(self):
-        return "Braid({}, n_strands={})".format(self._braid_list, self.n_strands)
+        return "Braid({}, n_strands={})".format(self._word.tolist(), self.n_strands)
 
     def __len__(self):
-        return len(self._braid_list)
+        if self._expression is not None:
+            return self._expression.length
+        return len(self._word)
+
+    def __iter__(self):
+        return iter(self._word)
 
     def __getitem__(self, key):
-        return self._braid_list[key]
+        if isinstance(key, slice):
+            return Braid._from_word(self._word[key], self.n_strands)
+        return self._word[key]
 
     def __setitem__(self, key, value):
         if isinstance(value, int):
-            maxval = value
+            maxval = abs(value)
             assert value != 0, "0 is not a valid generator"
         else:
+            if isinstance(value, Braid):
+                value = value._word
             assert all(isinstance(gen, int) for gen in value), "braid generators must be int"
-            maxval = max([abs(gen) for gen in value])
+            maxval = max([abs(gen) for gen in value], default=0)
             assert all(gen != 0 for gen in value), "0 is not a valid generator"
+            value = array(_TYPECODE, value)
 
         assert maxval < self.n_strands, (f"cannot use generator {maxval} on a braid with " +
                                          f"{self.n_strands} strands. You may increase the number of " +
                                          "strands using Braid.n_strands = {}".format(maxval + 1))
-        self._braid_list[key] = value
+        # the word may be shared with expressions of other braids, so it is copied before changing it
+        word = self._word[:] if self._shared else self._word
+        word[key] = value
+        self._word = word
+        self._key = None
+
+    def left_normal_form(self):
+        """
+        Garside left normal form, see garside.left_normal_form.
+        :return: (inf, factors), the braid is delta^inf times the permutation braids in factors
+        """
+        return garside.left_normal_form(self._word, self.n_strands)
+
+    def canonical_key(self):
+        """
+        Bytes which are equal for two braids exactly when they are equal as braids on the same number of strands.
+        """
+        if self._key is None:
+            self._key = garside.canonical_key(self._word, self.n_strands)
+        return self._key
+
+    def word_key(self):
+        """
+        Bytes which are equal for two braids exactly when they have the same word and number of strands.
+        """
+        return array("i", [self.n_strands]).tobytes() + self._word.tobytes()
+
+    def __eq__(self, other):
+        if not isinstance(other, Braid):
+            return NotImplemented
+        if self.n_strands != other.n_strands:
+            return False
+        if self._word == other._word:
+            return True
+        return self.canonical_key() == other.canonical_key()
+
+    def __hash__(self):
+        return hash(self.canonical_key())
 
     def _bump_gen(self, diff):
-        braid_list = []
-
-        for gen in self._braid_list:
-            if gen < 0:
-                braid_list += [gen - diff]
-            else:
-                braid_list += [gen + diff]
-
-        return Braid(braid_list, self.n_strands + diff)
+        return Braid._from_expression(wordexpr.shift(self.expression(), diff), self.n_strands + diff)
 
     def __add__(self, other):
         assert isinstance(other, Braid)
         return self * other._bump_gen(self.n_strands)
 
     def __neg__(self):
-        braid_list = [-gen for gen in self._braid_list]
-        return Braid(braid_list, n_strands=self.n_strands)
+        return Braid._from_expression(wordexpr.Mirror(self.expression()), self.n_strands)
 
     def __mul__(self, other):
         if isinstance(other, Braid):
             n_strands = max(self.n_strands, other.n_strands)
-            braid_list = self._braid_list + other._braid_list
-            product = Braid(braid_list, n_strands=n_strands)
+            product = Braid._from_expression(wordexpr.concat(self.expression(), other.expression()), n_strands)
         elif isinstance(other, int):
-            product = Braid()
+            # copies side by side, of the mirror image for negative other
             if other < 0:
                 other = abs(other)
                 self = - self
-            for i in range(other):
-                product += self
+            copies = [wordexpr.shift(self.expression(), i * self.n_strands) for i in range(other)]
+            product = Braid._from_expression(wordexpr.concat(*copies), other * self.n_strands)
         else:
             raise TypeError("unsupported operand type(s) for *: 'Braid' and '{}'".format(type(other)))
         return product
@@ -119,220 +234,157 @@ class Braid:
 
     def __pow__(self, power):
         assert isinstance(power, int)
-        braid_list = self._braid_list
         if power == 0:
-            braid_list = []
-        elif power < 0:
-            power = abs(power)
-            braid_list = [-gen for gen in braid_list]
-            braid_list = braid_list[::-1]
-        return Braid(braid_list*power, n_strands=self.n_strands)
+            return Braid._from_word(array(_TYPECODE), self.n_strands)
+        return Braid._from_expression(wordexpr.power(self.expression(), power), self.n_strands)
 
     def inverse(self):
         return self**-1
 
+    @instrument.timed
     def simplify(self):
-        braid_list = self._braid_list
-
-        def check_unobstructed(position, gen):
-            abs_gens = [abs(gen) for gen in braid_list]
-            if position > last_position[gen]:
-                intermediate_braids = abs_gens[last_position[gen]+1:position]
-            else:
-                intermediate_braids= abs_gens[last_position[gen]+1:] + abs_gens[:position]
-            ob_above = gen + 1 in intermediate_braids
-            ob_below = gen - 1 in intermediate_braids
-            ob = gen in intermediate_braids
-            obstructed = ob_above or ob_below or ob
-            return obstructed
-
-        last_position = {}
-        last_sign = {}
-        i = 0
-        while i < 2 * len(braid_list):
-            current_position = i % len(braid_list)
-            gen = abs(braid_list[current_position])
-            sign = braid_list[current_position] // gen
-            if gen in last_position.keys():
-                if current_position == last_position[gen]:
-                    i += 1
+        """
+        Cancels pairs of inverse generators which are only separated by generators commuting with them, first
+        along the word and then cyclically around the closure. Runs in time linear in the length of the braid.
+        :return: a new, simplified braid
+        """
+        word = self._word
+        kept = [True] * len(word)
+        # uncancelled positions of each generator in increasing order, cancellations only ever remove the last one
+        positions = [[] for _ in range(self.n_strands + 1)]
+
+        for position, gen in enumerate(word):
+            abs_gen = abs(gen)
+            same = positions[abs_gen]
+            if same and word[same[-1]] == -gen:
+                last = same[-1]
+                below = positions[abs_gen - 1]
+                above = positions[abs_gen + 1]
+                if (not below or below[-1] < last) and (not above or above[-1] < last):
+                    same.pop()
+                    kept[last] = False
+                    kept[position] = False
                     continue
-                if sign != last_sign[gen]:
-                    if not check_unobstructed(current_position, gen):
-                        first = min(current_position, last_position[gen])
-                        last = max(current_position, last_position[gen])
-                        braid_list.pop(last)
-                        braid_list.pop(first)
-
-                        i=0
-                        last_position = {}
-                        last_sign = {}
-                        continue
-            last_position[gen] = current_position
-            last_sign[gen] = sign
-            i += 1
-        return Braid(braid_list, n_strands=self.n_strands)
-
-    def super_simplify(self):
-
-        def _generator_bump(strand, generator):
-            abs_gen = abs(generator)
-            sign = generator // abs_gen
-            over_under = None
-            if abs_gen == strand:
-                strand += 1
-                if sign == 1:
-                    over_under = "under"
-                else:
-                    over_under = "over"
-            elif abs_gen == strand - 1:
-                strand += -1
-                if sign == -1:
-                    over_under = "under"
-                else:
-                    over_under = "over"
-            return strand, over_under
-
-        def _find_disk():
-            over_under = []
-            obs = False
-            for k, lower, upper in zip(range(i + 1, j-1), lower_s[:-1], upper_s[:-1]):
-                sign = braid_list[k]//abs(braid_list[k])
-                abs_gen = abs(braid_list[k])
-                print("********************************")
-                print("i:",i)
-                print("braid:",braid_list)
-                print("over_under",over_under)
-                print("upper:",upper_s)
-                print("lower",lower_s)
-
-                if abs_gen == lower - 1:
-                    if sign == 1:
-                        over_under = ["under"] + over_under
-                    else:
-                        over_under = ["over"] + over_under
-                elif abs_gen == upper:
-                    if sign == 1:
-                        over_under = over_under + ["over"]
-                    else:
-                        over_under = over_under + ["under"]
-                elif abs_gen == lower:
-                    if over_under[0] == "over" and sign == -1:
-                        obs = True
-                        break
-                    if over_under[0] == "under" and sign == +1:
-                        obs = True
-                        break
-                    over_under = over_under[1:]
-                elif abs_gen == upper - 1:
-                    if over_under[0] == "over" and sign == 1:
-                        obs = True
-                        break
-                    if over_under[0] == "under" and sign == -1:
-                        obs = True
-                        break
-                    over_under = over_under[:-1]
-                elif lower + 1 < abs_gen < upper:
-                    if over_under[abs_gen - lower -1] == over_under[abs_gen - lower]:
-                        obs = True
-                        break
-                    elif over_under[abs_gen - lower -1] == "under" and sign == -1:
-                        obs = True
-                        break
-                    elif over_under[abs_gen - lower - 1] == "upper" and sign == 1:
-                        obs = True
-                        break
-                    else:
-                        a, b = over_under[abs_gen - lower], over_under[abs_gen - lower - 1]
-                        over_under[abs_gen - lower], over_under[abs_gen - lower - 1] = b, a
-            return obs
-
-        i = -1
-        braid_list = self._braid_list
-        while i < len(braid_list) - 1:
-            i = (i + 1)
-            position = i % len(braid_list)
-            base_gen = abs(braid_list[position])
-            lower_s = [base_gen]
-            upper_s = [base_gen + 1]
-            base_sign = braid_list[position]//base_gen
-
-            base_strands_all_over = True
-            base_strands_all_under = True
-
-            j=position
-            while (position - 1 - j) % len(braid_list) != 0 and lower_s[-1] < upper_s[-1]:
-
-                j = (j + 1) % len(braid_list)
-                lower_end = lower_s[-1]
-                upper_end = upper_s[-1]
-
-
-                if base_strands_all_over or base_strands_all_under:
-                    if lower_end + 1 == upper_end:
-                        base_strands_all_over = True
-                        base_strands_all_under = True
-                else:
-                    break
-                current_gen = braid_list[j]
-
-                lower_end, lower_over_under = _generator_bump(lower_end, current_gen)
-                upper_end, upper_over_under = _generator_bump(upper_end, current_gen)
-
-                if lower_end < upper_end:
-                    if lower_over_under == "over" or upper_over_under == "over":
-                        base_strands_all_under = False
-                    if (lower_over_under == "under") or (upper_over_under == "under"):
-                        base_strands_all_over = False
-
-                lower_s += [lower_end]
-                upper_s += [upper_end]
-            if braid_list[j]//abs(braid_list[j]) == base_sign:
+            same.append(position)
+
+        # cyclic wraparound, a first occurrence which commutes to the front cancels a last occurrence which
+        # commutes to the end. positions[gen][heads[gen]:] are the occurrences still in the word.
+        heads = [0] * (self.n_strands + 1)
+
+        def first(gen):
+            if heads[gen] < len(positions[gen]):
+                return positions[gen][heads[gen]]
+            return None
+
+        def last(gen):
+            if heads[gen] < len(positions[gen]):
+                return positions[gen][-1]
+            return None
+
+        to_check = list(range(1, self.n_strands))
+        while to_check:
+            gen = to_check.pop()
+            start, end = first(gen), last(gen)
+            if start is None or start == end or word[start] != -word[end]:
                 continue
-            if lower_s[-1] > upper_s[-1]:
-                obstructed = True
-                if base_strands_all_over or base_strands_all_under:
-                    """
-                    print("*************************cancellation************************")
-                    print("position", position)
-                    print("braid:", braid_list)
-                    print("upper strand: ", upper_s)
-                    print("lower strand:", lower_s)
-                    print("all under:", base_strands_all_under)
-                    print("all over:", base_strands_all_over)
-                    """
-                    first, last = sorted([position, j])
-                    braid_list.pop(last)
-                    braid_list.pop(first)
-                    i = -1
-
-        return Braid(braid_list, n_strands=self.n_strands)
-
-    # invariants
-    def seifert_matrix(self): # maybe cache this one later - store as property of braid, and add a clear_cache method
-        # if not hasattr(self, "_seifert_matrix") or self._seifert_matrix is None:
-        #    self._seifert_matrix = invariants.seifert_matrix(self)
-        # return self._seifert_matrix
-
-        matrix = invariants.seifert_matrix(self)
-        return matrix
-
+            if any(first(neighbour) is not None and first(neighbour) < start for neighbour in (gen - 1, gen + 1)):
+                continue
+            if any(last(neighbour) is not None and last(neighbour) > end for neighbour in (gen - 1, gen + 1)):
+                continue
+            heads[gen] += 1
+            positions[gen].pop()
+            kept[start] = False
+            kept[end] = False
+            to_check += [neighbour for neighbour in (gen - 1, gen, gen + 1) if 0 < neighbour < self.n_strands]
+
+        word = array(_TYPECODE, compress(word, kept))
+        if instrument.enabled:
+            instrument.count("Braid.simplify.cancelled", len(self._word) - len(word))
+        return Braid._from_word(word, self.n_strands)
+
+    @instrument.timed
+    def handle_reduce(self, max_reductions=None):
+        """
+        Dehornoy handle reduction, see handles.reduce_handles. The result is empty exactly when the braid is trivial.
+        :param max_reductions: stop after this many handle reductions
+        :return: a new, handle free braid
+        """
+        word = self._word[:]
+        handles.reduce_handles(word, self.n_strands, max_reductions=max_reductions)
+        return Braid._from_word(word, self.n_strands)
+
+    @instrument.timed
+    def super_simplify(self, max_rounds=None):
+        """
+        Shortens the braid as a closed braid by alternating bigon cancellation, reduction of handles which do
+        not lengthen the word, and free cancellation, until a round no longer makes the word shorter.
+        :param max_rounds: stop after this many rounds
+        :return: a new, simplified braid
+        """
+        word = self._word[:]
+        rounds = 0
+        while max_rounds is None or rounds < max_rounds:
+            length = len(word)
+            handles.cancel_bigons(word)
+            handles.reduce_handles(word, self.n_strands, lengthening=False)
+            word = Braid._from_word(word, self.n_strands).simplify()._word
+            rounds += 1
+            if len(word) >= length:
+                break
+        if instrument.enabled:
+            instrument.count("Braid.super_simplify.cancelled", len(self._word) - len(word))
+            instrument.count("Braid.super_simplify.rounds", rounds)
+        return Braid._from_word(word, self.n_strands)
+
+    # invariants, cached in cache.default_cache
+    @instrument.timed
+    def seifert_matrix(self):
+        return cache.default_cache.cached("seifert_matrix", self.word_key, lambda: invariants.seifert_matrix(self))
+
+    @instrument.timed
     def signature(self):
+        return cache.default_cache.cached("signature", self.word_key,
+                                          lambda: invariants.signature(self.seifert_matrix()))
+
+    @instrument.timed
+    def determinant(self):
         matrix = self.seifert_matrix()
-        sig = invariants.signature(matrix)
-        return sig
+        det = invariants.knot_determinant(matrix)
+        return det
+
+    def tristram_levine(self, omegas):
+        """
+        Levine-Tristram signatures of the closure at each unit complex number in omegas, see
+        invariants.tristram_levine. Points within rounding of a root of the Alexander polynomial are evaluated at
+        the root.
+        :return: numpy array of signatures
+        """
+        matrix = self.seifert_matrix()
+        alex_poly = self.alexander_poly(method="interp")
+        # split links have a vanishing Alexander polynomial, their forms are degenerate at every point
+        jumps = () if alex_poly.is_zero else invariants.unit_circle_roots(alex_poly)
+        return invariants.tristram_levine(matrix, omegas, jumps=jumps)
 
+    @instrument.timed
     def burau_rep(self):
-        matrix = invariants.burau_rep(self)
-        return matrix
+        return cache.default_cache.cached("burau_rep", self.word_key, lambda: invariants.burau_rep(self))
+
+    @instrument.timed
+    def alexander_poly(self, method="burau", as_sympy=True):
+        name = "alexander_poly:{}:{}".format(method, bool(as_sympy))
+        return cache.default_cache.cached(name, self.word_key, lambda: self._alexander_poly(method, as_sympy))
 
-    def alexander_poly(self, method="burau"):
+    def _alexander_poly(self, method, as_sympy):
         if method == "burau":
-            matrix = self.burau_rep()
-            poly = invariants.burau_to_alexander(matrix)
+            matrix = invariants.burau_laurent(self)
+            poly = invariants.burau_to_alexander(matrix, as_sympy=as_sympy)
         elif method == "seifert":
             matrix = self.seifert_matrix()
-            poly = invariants.seifert_to_alexander(matrix)
+            poly = invariants.seifert_to_alexander(matrix, as_sympy=as_sympy)
+        elif method == "interp":
+            poly = invariants.interpolate_alexander(self, as_sympy=as_sympy)
+        else:
+            raise ValueError("unknown method {}, expected burau, seifert or interp".format(method))
         return poly
 
 
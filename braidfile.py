@@ -0,0 +1,219 @@
+import sys
+import os
+import mmap
+import struct
+import warnings
+from array import array
+from itertools import islice
+
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+
+from braid import Braid, parse_word
+
+# binary container: magic, then one record per braid, a uint16 number of strands, a uint32 length and the
+# generators as int8, then the uint64 offset of every record, then a footer of the number of braids, the offset of
+# the index and the magic again
+_MAGIC = b"KNOTBRD1"
+_RECORD = struct.Struct("<HI")
+_FOOTER = struct.Struct("<QQ8s")
+_MAX_GENERATOR = 127
+# braids are stored as int16 once read, see braid._TYPECODE
+_MAX_STORED = 2**15 - 1
+# braids parsed or converted together, which amortises the per braid work without holding the whole file
+_CHUNK = 2**16
+
+
+def read_text(file, n_strands=None):
+    """
+    Streams braids from a text file with one braid per line, in the format of Braid.from_string. Blank lines are
+    skipped, the file is never read whole.
+    :param file: path, or open text file
+    :param n_strands: number of strands of every braid, or None for one more than its largest generator
+    :return: generator of braids
+    :raises ValueError: with the line number, for a line which is not a braid, a generator of 2**15 or more, or a
+    generator too large for n_strands
+    """
+    if isinstance(file, str):
+        with open(file) as opened:
+            yield from read_text(opened, n_strands)
+        return
+    first_number = 1
+    while True:
+        chunk = list(islice(file, _CHUNK))
+        if not chunk:
+            return
+        lines, numbers = [], []
+        for number, line in enumerate(chunk, first_number):
+            if line and not line.isspace():
+                lines += [line if line.endswith("\n") else line + "\n"]
+                numbers += [number]
+        first_number += len(chunk)
+        if lines:
+            yield from _parse_lines(lines, numbers, n_strands)
+
+
+def _parse_lines(lines, numbers, n_strands):
+    # every generator of the chunk is parsed by numpy in one pass, each word ending with a 0, which is never a
+    # generator, then the words are cut at the zeros
+    text = "".join(lines)
+    for separator in "{};,":
+        text = text.replace(separator, " ")
+    try:
+        with warnings.catch_warnings():
+            # numpy only warns when it stops at a bad token
+            warnings.simplefilter("error", DeprecationWarning)
+            letters = np.fromstring(text.replace("\n", " 0 "), dtype=np.int64, sep=" ")
+    except (ValueError, DeprecationWarning):
+        _raise_parse_error(lines, numbers)
+    ends = np.flatnonzero(letters == 0)
+    if len(ends) != len(lines):
+        _raise_parse_error(lines, numbers)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    sizes = np.abs(letters)
+    limit = _MAX_STORED + 1 if n_strands is None else min(n_strands, _MAX_STORED + 1)
+    if len(sizes) and sizes.max() >= limit:
+        position = int(np.argmax(sizes >= limit))
+        number = numbers[int(np.searchsorted(ends, position))]
+        if n_strands is not None and sizes[position] < _MAX_STORED + 1:
+            raise ValueError("line {}: generator {} needs more than {} strands".format(
+                number, letters[position], n_strands))
+        raise ValueError("line {}: generator {} is not below 2**15".format(number, letters[position]))
+    if n_strands is None:
+        # the 0 ending each word keeps every segment non empty, and the empty word is on no strands
+        strands = np.where(starts < ends, np.maximum.reduceat(sizes, starts) + 1, 0)
+    else:
+        strands = np.full(len(lines), n_strands)
+    data = letters.astype("<i2").tobytes()
+    return [Braid._from_word(array("h", data[2 * start:2 * end]), int(n))
+            for start, end, n in zip(starts.tolist(), ends.tolist(), strands.tolist())]
+
+
+def _raise_parse_error(lines, numbers):
+    # numpy stops at the first bad token without saying where, so the chunk is parsed again line by line
+    for line, number in zip(lines, numbers):
+        try:
+            word = parse_word(line)
+        except (ValueError, OverflowError):
+            raise ValueError("line {}: could not parse {!r}".format(number, line.rstrip("\n"))) from None
+        if 0 in word:
+            raise ValueError("line {}: 0 is not a generator".format(number))
+    raise ValueError("could not parse lines {} to {}".format(numbers[0], numbers[-1]))
+
+
+def write_text(file, braids, braces=True):
+    """
+    Writes braids one per line, as {a;b;c} or as a;b;c without braces
+    :param file: path, or open text file
+    :param braids: iterable of braids, consumed one at a time
+    :return: number of braids written
+    """
+    if isinstance(file, str):
+        with open(file, "w") as opened:
+            return write_text(opened, braids, braces)
+    line = "{{{}}}\n" if braces else "{}\n"
+    count = 0
+    for braid in braids:
+        file.write(line.format(braid))
+        count += 1
+    return count
+
+
+def write_binary(path, braids):
+    """
+    Writes braids to the binary container read by BraidFile, streaming them so the braids need not fit in memory
+    at once. Generators must be at most 127 in absolute value.
+    :param path: path of the file
+    :param braids: iterable of braids
+    :return: number of braids written
+    """
+    offsets = array("Q")
+    with open(path, "wb") as file:
+        file.write(_MAGIC)
+        position = len(_MAGIC)
+        for braid in braids:
+            assert braid.max_generator() <= _MAX_GENERATOR, "generators must fit in int8 for the binary format"
+            letters = np.asarray(braid._word, dtype=np.int8).tobytes()
+            offsets.append(position)
+            file.write(_RECORD.pack(braid.n_strands, len(letters)))
+            file.write(letters)
+            position += _RECORD.size + len(letters)
+        file.write(offsets.tobytes())
+        file.write(_FOOTER.pack(len(offsets), position, _MAGIC))
+    return len(offsets)
+
+
+def _check_letters(letters, strands, indices):
+    """
+    :raises ValueError: with the index of the first braid with a generator 0, or too large for its strands
+    """
+    sizes = np.abs(letters.astype(np.int64))
+    bad = (sizes == 0) | (sizes >= strands)
+    if bad.any():
+        position = int(np.argmax(bad))
+        raise ValueError("braid {}: generator {} on {} strands".format(
+            indices[position], letters[position], strands[position]))
+
+
+class BraidFile:
+    """
+    Memory mapped binary container of braids written by write_binary, with random access through the offset index.
+    Only the records that are read are brought into memory.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        count, index_offset, magic = _FOOTER.unpack_from(self._map, len(self._map) - _FOOTER.size)
+        assert self._map[:len(_MAGIC)] == _MAGIC and magic == _MAGIC, "{} is not a braid file".format(path)
+        self._offsets = np.frombuffer(self._map, dtype="<u8", count=count, offset=index_offset)
+        self._index_offset = index_offset
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def _read(self, index):
+        offset = int(self._offsets[index])
+        n_strands, length = _RECORD.unpack_from(self._map, offset)
+        letters = np.frombuffer(self._map, dtype=np.int8, count=length, offset=offset + _RECORD.size)
+        _check_letters(letters, np.full(length, n_strands), index + np.zeros(length, dtype=np.int64))
+        return Braid._from_word(array("h", letters.astype("<i2").tobytes()), n_strands)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._read(index) for index in range(*key.indices(len(self)))]
+        return self._read(range(len(self))[key])
+
+    def __iter__(self):
+        # records are contiguous, so each chunk of records is checked and widened to int16 at once, headers
+        # included, and the words are sliced out of it
+        for first in range(0, len(self), _CHUNK):
+            base = int(self._offsets[first])
+            end = int(self._offsets[first + _CHUNK]) if first + _CHUNK < len(self) else self._index_offset
+            raw = np.frombuffer(self._map, dtype=np.uint8, count=end - base, offset=base)
+            offsets = self._offsets[first:first + _CHUNK].astype(np.int64) - base
+            headers = raw[offsets[:, None] + np.arange(_RECORD.size)]
+            strands = headers[:, :2].copy().view("<u2").ravel()
+            lengths = headers[:, 2:].copy().view("<u4").ravel().astype(np.int64)
+            if not np.array_equal(offsets + _RECORD.size + lengths, np.append(offsets[1:], end - base)):
+                raise ValueError("records {} to {} do not match the index".format(first, first + len(offsets) - 1))
+            owners = np.repeat(np.arange(len(offsets)), lengths)
+            positions = np.arange(len(owners)) + np.repeat(offsets + _RECORD.size - np.cumsum(lengths) + lengths,
+                                                           lengths)
+            _check_letters(raw[positions].view(np.int8), strands[owners], first + owners)
+            data = raw.view(np.int8).astype("<i2").tobytes()
+            for offset, n_strands, length in zip(offsets.tolist(), strands.tolist(), lengths.tolist()):
+                start = 2 * (offset + _RECORD.size)
+                yield Braid._from_word(array("h", data[start:start + 2 * length]), n_strands)
+
+    def close(self):
+        # the offset index is a view of the map, which must be released first
+        self._offsets = None
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
@@ -0,0 +1,83 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+
+import invariants
+from braid import Braid
+
+
+class _Node:
+    __slots__ = ("children", "burau")
+
+    def __init__(self, burau):
+        self.children = {}
+        self.burau = burau
+
+
+class BurauTree:
+    """
+    Trie of Burau matrices of products of blocks, for families of braids built from a few distinct blocks such as
+    search.twisted_braid. Each node holds the Burau matrix of the product of the blocks on the path to it, so a new
+    product only costs the blocks after its longest known prefix, and the matrix of each distinct block is kept so
+    products can end with a shared suffix at the cost of one matrix multiplication. A block may be given as a pair
+    (braid, power), whose matrix is found by repeated squaring, see invariants.burau_power.
+    Matrices are (coefficients, low_degree) as returned by invariants.burau_coefficients.
+    """
+    def __init__(self, n_strands):
+        self.n_strands = n_strands
+        self._root = _Node(invariants.burau_coefficients(_on_strands([], n_strands)))
+        self._blocks = {}
+        self.n_letters = 0
+        self.n_products = 0
+
+    def block(self, block, power=1):
+        """
+        :param block: braid on at most n_strands strands
+        :return: Burau matrix of block**power
+        """
+        block = _on_strands(block, self.n_strands)
+        key = (block.word_key(), power)
+        if key not in self._blocks:
+            self._blocks[key] = invariants.burau_power(block, power)
+            self.n_letters += len(block)
+        return self._blocks[key]
+
+    def product(self, blocks, suffix=None):
+        """
+        :param blocks: list of braids on at most n_strands strands, or of pairs (braid, power)
+        :param suffix: braid multiplied on the right of the blocks through its cached matrix, rather than stored
+        in the trie, for the last block shared by every product
+        :return: Burau matrix of the product of blocks and suffix
+        """
+        node = self._root
+        for block in blocks:
+            block, power = block if isinstance(block, tuple) else (block, 1)
+            block = _on_strands(block, self.n_strands)
+            key = (block.word_key(), power)
+            if key not in node.children:
+                burau = invariants.burau_product(node.burau, self.block(block, power))
+                self.n_products += 1
+                node.children[key] = _Node(burau)
+            node = node.children[key]
+        if suffix is None:
+            return node.burau
+        self.n_products += 1
+        return invariants.burau_product(node.burau, self.block(suffix))
+
+    def __len__(self):
+        """
+        Number of products stored in the trie
+        """
+        count, stack = 0, [self._root]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children.values())
+        return count
+
+
+def _on_strands(block, n_strands):
+    block = list(block)
+    assert all(abs(gen) < n_strands for gen in block), "block on more than {} strands".format(n_strands)
+    return Braid(block, n_strands=n_strands)
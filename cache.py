@@ -0,0 +1,156 @@
+import os
+import pickle
+import sqlite3
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class InvariantCache:
+    """
+    Cache of braid invariants, an in memory LRU in front of an optional SQLite file. Entries are keyed by the name
+    of the invariant and a byte string key of the braid, Braid.word_key, which is cheap. Braid.canonical_key would
+    also share entries between equal braids, but costs a Garside normal form, often more than the invariant. The
+    SQLite file may be shared between processes, each process opens its own connection.
+    """
+    def __init__(self, maxsize=1024, path=None, max_disk_entries=None):
+        """
+        :param maxsize: number of entries kept in memory, 0 to disable the memory cache
+        :param path: SQLite file to also store entries in, None for memory only
+        :param max_disk_entries: number of entries kept on disk, the oldest are removed first, None for no limit
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._connection = None
+        self._pid = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _db(self):
+        if self.path is None:
+            return None
+        if self._connection is None or self._pid != os.getpid():
+            # connections cannot be shared with forked processes, so each process opens its own
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS invariants "
+                                     "(name TEXT, key BLOB, value BLOB, PRIMARY KEY (name, key))")
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+    def _remember(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, name, braid_key, default=None):
+        """
+        :return: the cached value of invariant name for the braid with key braid_key, or default
+        """
+        key = (name, braid_key)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return _copy(self._memory[key])
+        db = self._db()
+        if db is not None:
+            row = db.execute("SELECT value FROM invariants WHERE name = ? AND key = ?", key).fetchone()
+            if row is not None:
+                value = pickle.loads(row[0])
+                self._remember(key, value)
+                self.disk_hits += 1
+                return _copy(value)
+        self.misses += 1
+        return default
+
+    def put(self, name, braid_key, value):
+        key = (name, braid_key)
+        if self.maxsize > 0:
+            self._remember(key, _copy(value))
+        db = self._db()
+        if db is not None:
+            with db:
+                db.execute("INSERT OR REPLACE INTO invariants (name, key, value) VALUES (?, ?, ?)",
+                           key + (pickle.dumps(value),))
+                if self.max_disk_entries is not None:
+                    db.execute("DELETE FROM invariants WHERE rowid IN (SELECT rowid FROM invariants ORDER BY rowid "
+                               "LIMIT max(0, (SELECT count(*) FROM invariants) - ?))", (self.max_disk_entries,))
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0 or self.path is not None
+
+    def cached(self, name, braid_key, compute):
+        """
+        :param braid_key: key of the braid, or function of no arguments returning it, only called when the cache is
+        enabled
+        :param compute: function of no arguments returning the invariant, called on a miss
+        :return: the cached or newly computed value of invariant name for the braid with key braid_key
+        """
+        if not self.enabled:
+            self.misses += 1
+            return compute()
+        if callable(braid_key):
+            braid_key = braid_key()
+        value = self.get(name, braid_key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(name, braid_key, value)
+        return value
+
+    def clear(self, disk=False):
+        """
+        Empties the memory cache and resets the statistics, and with disk also deletes every entry in the file.
+        """
+        self._memory.clear()
+        self.hits = self.disk_hits = self.misses = 0
+        db = self._db()
+        if disk and db is not None:
+            with db:
+                db.execute("DELETE FROM invariants")
+
+    def info(self):
+        """
+        :return: dictionary of hit and miss counts and the number of entries in memory and on disk
+        """
+        db = self._db()
+        disk_size = db.execute("SELECT count(*) FROM invariants").fetchone()[0] if db is not None else 0
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "size": len(self._memory), "maxsize": self.maxsize, "disk_size": disk_size}
+
+
+def _copy(value):
+    """
+    Copies mutable matrices so callers cannot change cached values
+    """
+    if hasattr(value, "copy") and not isinstance(value, (bytes, str)):
+        return value.copy()
+    return value
+
+
+# cache used by the invariant methods of Braid
+default_cache = InvariantCache()
+
+
+def configure(maxsize=1024, path=None, max_disk_entries=None):
+    """
+    Replaces the cache used by Braid, e.g. to store invariants in an SQLite file shared between sweep workers.
+    """
+    global default_cache
+    default_cache = InvariantCache(maxsize=maxsize, path=path, max_disk_entries=max_disk_entries)
+    return default_cache
+
+
+def clear_cache(disk=False):
+    default_cache.clear(disk=disk)
+
+
+def cache_info():
+    return default_cache.info()
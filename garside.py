@@ -0,0 +1,118 @@
+import sys
+import struct
+from array import array
+
+
+def _identity(n_strands):
+    return list(range(n_strands))
+
+
+def _delta(n_strands):
+    return list(range(n_strands - 1, -1, -1))
+
+
+def _flip(perm):
+    """
+    Conjugates a permutation braid by the half twist, which sends generator i to generator n - i.
+    """
+    n_strands = len(perm)
+    return [n_strands - 1 - perm[n_strands - 1 - position] for position in range(n_strands)]
+
+
+def _letter_factor(gen, n_strands):
+    """
+    Permutation braid of a letter. A negative letter -i is written as delta^-1 * X with X = delta * s_i^-1, and X
+    is returned.
+    :return: permutation, perm[p] is the end position of the strand starting at position p
+    """
+    abs_gen = abs(gen)
+    perm = _identity(n_strands)
+    perm[abs_gen - 1], perm[abs_gen] = abs_gen, abs_gen - 1
+    if gen < 0:
+        perm = [perm[end] for end in _delta(n_strands)]
+    return perm
+
+
+def _inverse(perm):
+    inverse = [0] * len(perm)
+    for position, end in enumerate(perm):
+        inverse[end] = position
+    return inverse
+
+
+def _make_left_weighted(left, right):
+    """
+    Moves generators from the start of right to the end of left, in place, until every generator starting right
+    also finishes left. The pair is then in left normal form.
+    :param left: permutation of a permutation braid
+    :param right: permutation of a permutation braid
+    :return: True if anything was moved
+    """
+    left_inverse = _inverse(left)
+    changed = False
+    i = 1
+    while i < len(left):
+        # s_i starts right if the strands starting at i - 1, i cross, and finishes left if the strands ending there cross
+        if right[i - 1] > right[i] and left_inverse[i - 1] < left_inverse[i]:
+            right[i - 1], right[i] = right[i], right[i - 1]
+            first, second = left_inverse[i - 1], left_inverse[i]
+            left[first], left[second] = i, i - 1
+            left_inverse[i - 1], left_inverse[i] = second, first
+            changed = True
+            i = max(i - 1, 1)
+        else:
+            i += 1
+    return changed
+
+
+def left_normal_form(word, n_strands):
+    """
+    Garside left normal form delta^inf * A_1 * ... * A_k, with every A_j a permutation braid other than the identity
+    and delta, and every pair A_j, A_(j+1) left weighted. Two words represent the same braid exactly when their
+    normal forms are equal.
+    :param word: sequence of generators
+    :param n_strands: number of strands of the braid
+    :return: (inf, factors), factors a list of permutations encoded as little endian uint16 bytes, p -> factor[p],
+    which allows as many strands as braid words
+    """
+    identity = _identity(n_strands)
+    delta = _delta(n_strands)
+    inf = 0
+    factors = []
+    # moving each delta^-1 to the front conjugates every factor before it by delta
+    flips_after = sum(1 for gen in word if gen < 0)
+    for gen in word:
+        if gen < 0:
+            flips_after -= 1
+            inf -= 1
+        factor = _letter_factor(gen, n_strands)
+        if flips_after % 2:
+            factor = _flip(factor)
+        factors.append(factor)
+        for j in range(len(factors) - 1, 0, -1):
+            if not _make_left_weighted(factors[j - 1], factors[j]):
+                break
+        if factors[-1] == identity:
+            factors.pop()
+
+    while factors and factors[0] == delta:
+        factors.pop(0)
+        inf += 1
+    while factors and factors[-1] == identity:
+        factors.pop()
+    return inf, [_encode(factor) for factor in factors]
+
+
+def _encode(perm):
+    factor = array("H", perm)
+    if sys.byteorder == "big":
+        factor.byteswap()
+    return factor.tobytes()
+
+
+def canonical_key(word, n_strands):
+    """
+    Byte string which is equal for two words exactly when they represent the same braid on n_strands strands.
+    """
+    inf, factors = left_normal_form(word, n_strands)
+    return struct.pack("<ii", n_strands, inf) + b"".join(factors)
@@ -0,0 +1,168 @@
+from array import array
+from bisect import bisect_left
+
+
+def _truncate_stacks(stacks, position):
+    for stack in stacks:
+        while stack and stack[-1] >= position:
+            stack.pop()
+
+
+def find_handle(word, start, stacks):
+    """
+    Finds the first handle of word ending at or after start. A handle is a subword gen ... -gen in which every
+    letter in between has a larger absolute value than gen. The first handle to end contains no other handle, so
+    it can always be reduced.
+    :param word: array of generators
+    :param start: index to start scanning from
+    :param stacks: stacks[gen] is the list of positions of gen or -gen in word[:start], updated while scanning
+    :return: (first, last) indices of the handle, or None if word[start:] closes no handle
+    """
+    for position in range(start, len(word)):
+        gen = word[position]
+        abs_gen = abs(gen)
+        previous = -1
+        for lower_gen in range(1, abs_gen + 1):
+            if stacks[lower_gen] and stacks[lower_gen][-1] > previous:
+                previous = stacks[lower_gen][-1]
+        if previous >= 0 and word[previous] == -gen:
+            return previous, position
+        stacks[abs_gen].append(position)
+    return None
+
+
+def reduce_handle(word, first, last):
+    """
+    Reduces the handle word[first:last + 1] in place, using
+    s_i^e s_(i+1)^d s_i^-e = s_(i+1)^-e s_i^d s_(i+1)^e
+    for every s_(i+1) between the ends of the handle, and cancelling the s_(i+1)^e s_(i+1)^-e pairs this creates.
+    :param word: array of generators
+    :param first: index of the opening letter of the handle
+    :param last: index of the closing letter of the handle
+    :return: change in length of word
+    """
+    gen = word[first]
+    abs_gen = abs(gen)
+    sign = 1 if gen > 0 else -1
+    upper = (abs_gen + 1) * sign
+
+    reduced = array(word.typecode)
+    for inner_gen in word[first + 1:last]:
+        if inner_gen == abs_gen + 1 or inner_gen == -abs_gen - 1:
+            if reduced and reduced[-1] == upper:
+                reduced.pop()
+            else:
+                reduced.append(-upper)
+            reduced.append(abs_gen if inner_gen > 0 else -abs_gen)
+            reduced.append(upper)
+        else:
+            reduced.append(inner_gen)
+    word[first:last + 1] = reduced
+    return len(reduced) - (last - first + 1)
+
+
+def reduce_handles(word, n_strands, max_reductions=None, lengthening=True):
+    """
+    Dehornoy handle reduction, repeatedly reduces the first handle to end until none are left. The result is
+    then empty, or has only positive or only negative occurrences of its smallest generator.
+    :param word: array of generators, reduced in place
+    :param n_strands: number of strands of the braid
+    :param max_reductions: stop after this many reductions, the word still represents the same braid
+    :param lengthening: if False, skip handles containing more than one s_(i+1), whose reduction makes the word
+    longer. The word may then still contain handles.
+    :return: number of reductions performed
+    """
+    stacks = [[] for _ in range(n_strands)]
+    reductions = 0
+    start = 0
+    while max_reductions is None or reductions < max_reductions:
+        handle = find_handle(word, start, stacks)
+        if handle is None:
+            break
+        first, last = handle
+        if not lengthening:
+            upper = abs(word[first]) + 1
+            if sum(1 for gen in word[first + 1:last] if gen == upper or gen == -upper) > 1:
+                stacks[abs(word[last])].append(last)
+                start = last + 1
+                continue
+        reduce_handle(word, first, last)
+        reductions += 1
+        start = first
+        _truncate_stacks(stacks, start)
+    return reductions
+
+
+def find_bigon(word, position):
+    """
+    Follows the two strands crossing at word[position] cyclically around the closure until they next cross. The
+    crossings cancel if they have opposite signs and, between any two times the strands are next to each other,
+    every other strand crossing them passes over both or under both.
+    :param word: array of generators
+    :param position: index of the opening crossing
+    :return: (closing, reach) with closing the index of the crossing closing a cancellable bigon, or None, and
+    reach the last index looked at, counting on past the end of the word if the search wrapped around
+    """
+    length = len(word)
+    gen = word[position]
+    lower = abs(gen)
+    upper = lower + 1
+    # a strand moving up through a positive crossing passes under, moving down it passes over
+    all_over = all_under = True
+    for index in range(position + 1, position + length):
+        current = word[index % length]
+        abs_current = abs(current)
+        if upper == lower + 1:
+            if abs_current == lower:
+                if (current > 0) != (gen > 0):
+                    return index % length, index
+                return None, index
+            all_over = all_under = True
+        if abs_current == lower or abs_current == upper:
+            passes_under = current > 0
+        elif abs_current == lower - 1 or abs_current == upper - 1:
+            passes_under = current < 0
+        else:
+            continue
+        if passes_under:
+            all_over = False
+        else:
+            all_under = False
+        if not (all_over or all_under):
+            return None, index
+        if abs_current == lower:
+            lower += 1
+        elif abs_current == lower - 1:
+            lower -= 1
+        elif abs_current == upper:
+            upper += 1
+        else:
+            upper -= 1
+    return None, position + length
+
+
+def cancel_bigons(word, max_cancellations=None):
+    """
+    Cancels the bigon opened by the earliest crossing possible until there are none left, in place. After a
+    cancellation only the crossings whose search looked at the removed letters are searched again.
+    :param word: array of generators, reduced in place
+    :param max_cancellations: stop after this many cancellations
+    :return: number of cancellations performed
+    """
+    # furthest index looked at by the searches from each position so far, as a running maximum
+    reach = []
+    cancellations = 0
+    position = 0
+    while position < len(word) and (max_cancellations is None or cancellations < max_cancellations):
+        closing, last = find_bigon(word, position)
+        del reach[position:]
+        if closing is None:
+            reach.append(max(last, reach[-1]) if reach else last)
+            position += 1
+            continue
+        first = min(position, closing)
+        del word[max(position, closing)]
+        del word[first]
+        cancellations += 1
+        position = min(bisect_left(reach, first), first)
+    return cancellations
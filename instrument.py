@@ -0,0 +1,158 @@
+import os
+import json
+import time
+from functools import wraps
+
+# instrumentation is off unless enabled here or with the environment variable KNOTS_INSTRUMENT=1, when off the
+# wrapped functions only pay for one test of this flag
+enabled = os.environ.get("KNOTS_INSTRUMENT", "") not in ("", "0")
+
+# name -> [calls, seconds]
+_timings = {}
+# name -> [events, total, largest]
+_counters = {}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    _timings.clear()
+    _counters.clear()
+
+
+def _add_time(name, seconds, calls=1):
+    timing = _timings.setdefault(name, [0, 0.0])
+    timing[0] += calls
+    timing[1] += seconds
+
+
+def count(name, amount=1):
+    """
+    Adds amount to counter name, also keeping the number of events and the largest amount. Call sites should test
+    instrument.enabled first.
+    """
+    counter = _counters.setdefault(name, [0, 0, amount])
+    counter[0] += 1
+    counter[1] += amount
+    counter[2] = max(counter[2], amount)
+
+
+def matrix(name, matrix):
+    """
+    Counts the dimension and number of non zero entries of a SparseMatrix, or of a numpy array of coefficients,
+    under name.rows and name.non_zero
+    """
+    if hasattr(matrix, "index_value_dict"):
+        rows, non_zero = matrix.rows, len(matrix.index_value_dict())
+    else:
+        rows, non_zero = matrix.shape[0], int((matrix != 0).sum())
+    count(name + ".rows", rows)
+    count(name + ".non_zero", non_zero)
+
+
+def timed(function=None, name=None):
+    """
+    Decorator timing each call of function under name, module.qualified name of the function by default.
+    Nested timed calls are included in the time of the outer call.
+    """
+    if function is None:
+        return lambda function: timed(function, name)
+    if name is None:
+        name = "{}.{}".format(function.__module__, function.__qualname__)
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _add_time(name, time.perf_counter() - start)
+    return wrapper
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        _add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoStage:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name):
+    """
+    Context manager timing the block it wraps under name.
+    """
+    return _Stage(name) if enabled else _NO_STAGE
+
+
+def snapshot():
+    """
+    :return: the timings and counters of this process, as a dictionary which can be sent to another process
+    """
+    return {"timings": {name: list(timing) for name, timing in _timings.items()},
+            "counters": {name: list(counter) for name, counter in _counters.items()}}
+
+
+def merge(other):
+    """
+    Adds the timings and counters of a snapshot, e.g. from a worker process
+    """
+    for name, (calls, seconds) in other["timings"].items():
+        _add_time(name, seconds, calls)
+    for name, (events, total, largest) in other["counters"].items():
+        counter = _counters.setdefault(name, [0, 0, largest])
+        counter[0] += events
+        counter[1] += total
+        counter[2] = max(counter[2], largest)
+
+
+def summary():
+    """
+    :return: table of the timings, slowest first, then of the counters
+    """
+    lines = ["{:<48} {:>9} {:>12} {:>12}".format("stage", "calls", "seconds", "mean")]
+    for name, (calls, seconds) in sorted(_timings.items(), key=lambda item: -item[1][1]):
+        lines += ["{:<48} {:>9} {:>12.4f} {:>12.6f}".format(name, calls, seconds, seconds / calls)]
+    lines += ["", "{:<48} {:>9} {:>12} {:>12}".format("counter", "events", "total", "largest")]
+    for name, (events, total, largest) in sorted(_counters.items()):
+        lines += ["{:<48} {:>9} {:>12} {:>12}".format(name, events, total, largest)]
+    return "\n".join(lines)
+
+
+def dump(path=None):
+    """
+    :param path: file to write the snapshot to as JSON, or None
+    :return: the snapshot as a JSON string
+    """
+    text = json.dumps(snapshot(), indent=1, sort_keys=True)
+    if path is not None:
+        with open(path, "w") as file:
+            file.write(text)
+    return text
@@ -1,64 +1,95 @@
 import sympy
-from sympy import PurePoly, eye, pexquo, zeros, SparseMatrix
+from sympy import ImmutableMatrix, eye, zeros
 from sympy.abc import t
 
 import sys
 import os
+from functools import lru_cache
+from math import ceil
+
+import numpy as np
 
 sys.path.append(os.path.dirname(__file__))
 
+import instrument
+import modular
 import sparsedet
+import wordexpr
+from laurent import LaurentPoly
 
 def _homology_generators(braid):
+    """
+    :return: list with entry i the index of the next occurrence of generator abs(braid[i]) after i, or 0 if there
+    is none, for every letter but the last
+    """
     hom_generators = [0]*(len(braid)-1)
-    for i in range(len(braid)-1):
-        hom_generators[i] = 0
-        j = i+1
-        while hom_generators[i] == 0 and j < len(braid):
-            if abs(braid[i]) == abs(braid[j]):
-                hom_generators[i] = j
-            j = j + 1
+    next_position = {}
+    for i in range(len(braid) - 1, -1, -1):
+        gen = abs(braid[i])
+        if i < len(braid) - 1:
+            hom_generators[i] = next_position.get(gen, 0)
+        next_position[gen] = i
     return hom_generators
 
 
+@instrument.timed
 def seifert_matrix(braid):
-    hom_generators = _homology_generators(braid)
-    s_matrix = sparsedet.SparseMatrix.zeros(len(hom_generators), len(hom_generators))
-
-    for i in range(len(hom_generators)):
-        if hom_generators[i] == 0:
-            continue
+    """
+    Seifert matrix of the closure of braid, from the surface with one disk per strand and one band per crossing.
+    Homology generators run between consecutive occurrences of the same generator. The only non zero entries are
+    the diagonal, the link with the next generator at the same height, and the links with the last generators just
+    above and below before it ends, so the matrix is built in one pass with O(len(braid)) entries.
+    :param braid: Braid
+    :return: sparsedet.SparseMatrix
+    """
+    # entries[(i, j)] in terms of letter indices, each homology generator starting at its first letter
+    entries = {}
+    last_position = {}
+    for position, gen in enumerate(braid):
+        abs_gen = abs(gen)
+        if abs_gen in last_position:
+            i = last_position[abs_gen]
+            if braid[i] > 0 and gen > 0:
+                entries[i, i] = -1
+            elif braid[i] < 0 and gen < 0:
+                entries[i, i] = 1
 
-        if braid[i] > 0 and braid[hom_generators[i]] > 0:
-            s_matrix[i, i] = -1
-        elif braid[i] < 0 and braid[hom_generators[i]] < 0:
-            s_matrix[i, i] = 1
+            if gen > 0:
+                entries[position, i] = 1
+            else:
+                entries[i, position] = -1
 
-        for j in range(i+1, len(hom_generators)):
-            if hom_generators[i] == j:
-                if braid[j] > 0:
-                    s_matrix[j, i] = 1
-                else:
-                    s_matrix[i, j] = -1
+            below = last_position.get(abs_gen - 1, -1)
+            if below > i:
+                entries[below, i] = -1
+            above = last_position.get(abs_gen + 1, -1)
+            if above > i:
+                entries[i, above] = 1
+        last_position[abs_gen] = position
 
-            elif i < j < hom_generators[i] < hom_generators[j]:
-                separating_strands = abs(braid[i]) - abs(braid[j])
-                if separating_strands == 1:
-                    s_matrix[j, i] = -1
-                elif separating_strands == -1:
-                    s_matrix[i, j] = 1
+    # only letters followed by another occurrence of the same generator start a homology generator
+    last_letters = set(last_position.values())
+    index_map = {}
+    for position in range(len(braid)):
+        if position not in last_letters:
+            index_map[position] = len(index_map)
 
-    for i in range(len(hom_generators) - 1, 0, -1):
-        if hom_generators[i] == 0:
-            s_matrix = s_matrix.row_del(i)
-            s_matrix = s_matrix.col_del(i)
-    return s_matrix
+    row_col_dict = {}
+    for (i, j), value in entries.items():
+        if i in index_map and j in index_map:
+            row_col_dict.setdefault(index_map[i], {})[index_map[j]] = value
+    matrix = sparsedet.SparseMatrix(row_col_dict, rows=len(index_map), cols=len(index_map))
+    if instrument.enabled:
+        instrument.matrix("invariants.seifert_matrix", matrix)
+    return matrix
 
+@lru_cache(maxsize=None)
 def _get_reduced_burau_matrices(n):
     """
-    Generates reduced Burau matrices for braid group B_n
+    Generates reduced Burau matrices for braid group B_n, built once per n
     :param n: number of strands of braid group
-    :return: dictionary "reps" of reduced Burau matrices with reps[i] the Burau matrices for the ith braid generator
+    :return: dictionary "reps" of reduced Burau matrices with reps[i] the Burau matrices for the ith braid generator,
+    immutable as they are shared between calls
     """
     assert n >= 2
     reps = {}
@@ -76,111 +107,909 @@ def _get_reduced_burau_matrices(n):
         reps[n - 1], reps[-n + 1] = eye(n - 1), eye(n - 1)
         reps[n - 1][n - 2, n - 3:n - 1] = [[t, -t]]
         reps[-n + 1][n - 2, n - 3:n - 1] = [[1, -1/t]]
-    return reps
+    return {gen: ImmutableMatrix(rep) for gen, rep in reps.items()}
+
+@lru_cache(maxsize=None)
+def _burau_row_updates(n):
+    """
+    Non identity row of each reduced Burau generator, as read off _get_reduced_burau_matrices.
+    :param n: number of strands of braid group
+    :return: dictionary "updates" with updates[i] the (column, sign, power of t) of each entry of the row of
+    generator i which differs from the identity matrix. The row is row abs(i) - 1.
+    """
+    assert n >= 2
+    updates = {}
+    if n == 2:
+        updates[1], updates[-1] = ((0, -1, 1),), ((0, -1, -1),)
+    else:
+        updates[1], updates[-1] = ((0, -1, 1), (1, 1, 0)), ((0, -1, -1), (1, 1, -1))
+        for i in range(2, n - 1):
+            updates[i] = ((i - 2, 1, 1), (i - 1, -1, 1), (i, 1, 0))
+            updates[-i] = ((i - 2, 1, 0), (i - 1, -1, -1), (i, 1, -1))
+        updates[n - 1] = ((n - 3, 1, 1), (n - 2, -1, 1))
+        updates[-n + 1] = ((n - 3, 1, 0), (n - 2, -1, -1))
+    return updates
+
+
+@lru_cache(maxsize=None)
+def _burau_update_table(n):
+    """
+    _burau_row_updates as arrays indexed by generator + n - 1, to apply the letters of many braids at once.
+    The padding generator 0 leaves row 0 as it is.
+    :return: (rows, signs, powers), generator i changes row rows[i + n - 1] by adding the old row times
+    signs[i + n - 1, d] t^powers[i + n - 1, d] to row rows[i + n - 1] + d - 1, or replacing it for d = 1, and signs
+    are 0 where there is no such row
+    """
+    rows = np.zeros(2 * n - 1, dtype=np.int64)
+    signs = np.zeros((2 * n - 1, 3), dtype=np.int64)
+    powers = np.zeros((2 * n - 1, 3), dtype=np.int64)
+    signs[n - 1, 1] = 1
+    for gen, entries in _burau_row_updates(n).items():
+        row = abs(gen) - 1
+        rows[gen + n - 1] = row
+        for col, sign, power in entries:
+            signs[gen + n - 1, col - row + 1] = sign
+            powers[gen + n - 1, col - row + 1] = power
+    return rows, signs, powers
+
+
+# largest coefficient allowed before switching to python integers, a generator at most triples coefficients
+_INT64_LIMIT = 2**62 // 3**16
+
+
+@instrument.timed
+def burau_coefficients(braid):
+    """
+    Reduced Burau matrix as an array of Laurent polynomial coefficients. Multiplying by a generator on the right
+    only changes the columns listed in _burau_row_updates, so the matrix is stored transposed and each letter is
+    applied as an in place update of those rows, without any symbolic arithmetic.
+    :param braid: braid on at least two strands
+    :return: (coefficients, low_degree), coefficients[i, j, k] is the coefficient of t^(low_degree + k) in entry
+    j, i of the Burau matrix
+    """
+    expression = braid.expression()
+    if isinstance(expression, wordexpr.Word):
+        return burau_apply(*_burau_identity(braid.n_strands), braid)
+    return burau_expression(expression, braid.n_strands)
+
+
+def burau_expression(expression, n, shift=0, inverse=False, mirror=False):
+    """
+    Burau matrix of a lazy braid word without flattening it. Runs of explicit words are applied letter by letter,
+    powers by repeated squaring as in burau_power, and a power met several times in the DAG is computed once.
+    :param expression: wordexpr.Node on at most n strands
+    :param shift: strand shift, inverse and mirror applied to expression, see wordexpr.leaves
+    :return: (coefficients, low_degree), see burau_coefficients
+    """
+    result = _burau_identity(n)
+    letters, powers = [], {}
+    for node, node_shift, node_inverse, node_mirror in wordexpr.leaves(expression, shift, inverse, mirror):
+        if isinstance(node, wordexpr.Word):
+            letters += wordexpr.transform(node.word, node_shift, node_inverse, node_mirror)
+            continue
+        key = (id(node), node_shift, node_inverse, node_mirror)
+        if key not in powers:
+            child, flags = node.child, (node_shift, node_inverse, node_mirror)
+            if isinstance(child, wordexpr.Word):
+                powers[key] = _burau_word_power(wordexpr.transform(child.word, *flags), n, node.power)
+            else:
+                powers[key] = _burau_square_power(burau_expression(child, n, *flags), node.power,
+                                                  lambda: wordexpr.transform(child.flatten(), *flags))
+        result = burau_product(burau_apply(*result, letters), powers[key])
+        letters = []
+    return burau_apply(*result, letters)
+
+
+def burau_apply(transposed, low_degree, word):
+    """
+    Multiplies a Burau matrix on the right by the letters of word, see burau_coefficients.
+    :param transposed: coefficients of the transposed Burau matrix, as returned by burau_coefficients
+    :param low_degree: power of t of transposed[:, :, 0]
+    :param word: braid, or iterable of generators, on the same number of strands
+    :return: (coefficients, low_degree) of the product
+    """
+    word = list(word)
+    updates = _burau_row_updates(transposed.shape[0] + 1)
+    n_negative = sum(1 for gen in word if gen < 0)
+    old_width = transposed.shape[2]
+    dtype = transposed.dtype
+    if dtype == np.int64 and np.abs(transposed).max() > _INT64_LIMIT:
+        dtype = object
+    start = transposed
+    transposed = np.zeros(transposed.shape[:2] + (old_width + len(word),), dtype=dtype)
+    transposed[:, :, n_negative:n_negative + old_width] = start
+    for count, gen in enumerate(word):
+        row = abs(gen) - 1
+        old_row = transposed[row].copy()
+        for col, sign, power in updates[gen]:
+            if power == 0:
+                shifted = old_row
+            else:
+                shifted = np.zeros_like(old_row)
+                if power > 0:
+                    shifted[:, power:] = old_row[:, :-power]
+                else:
+                    shifted[:, :power] = old_row[:, -power:]
+            if col == row:
+                transposed[col] = sign * shifted
+            elif sign > 0:
+                transposed[col] += shifted
+            else:
+                transposed[col] -= shifted
+        if count % 16 == 15 and transposed.dtype == np.int64 and np.abs(transposed).max() > _INT64_LIMIT:
+            transposed = transposed.astype(object)
+    return transposed, low_degree - n_negative
+
+
+def _burau_identity(n):
+    identity = np.zeros((n - 1, n - 1, 1), dtype=np.int64)
+    identity[range(n - 1), range(n - 1), 0] = 1
+    return identity, 0
+
+
+@instrument.timed
+def burau_power(braid, power):
+    """
+    Burau matrix of braid**power by repeated squaring of the Burau matrix of braid, so O(log power) matrix products
+    rather than power times the letters of braid. The n-th power of sigma_1 ... sigma_(n-1), or of
+    sigma_(n-1) ... sigma_1, is the full twist, which is central and acts as t^n, so powers of these and their
+    inverses only need the remainder modulo n.
+    :param braid: braid on at least two strands
+    :param power: integer
+    :return: (coefficients, low_degree), see burau_coefficients
+    """
+    word = list(braid)
+    if power < 0:
+        word, power = [-gen for gen in reversed(word)], -power
+    return _burau_word_power(word, braid.n_strands, power)
+
+
+def _burau_word_power(word, n, power):
+    """
+    burau_power of a list of generators on n strands, power >= 0
+    """
+    shift = 0
+    generators = [abs(gen) for gen in word]
+    if generators in (list(range(1, n)), list(range(n - 1, 0, -1))) and len(set(gen > 0 for gen in word)) == 1:
+        full_twists, power = divmod(power, n)
+        shift = n * full_twists * (1 if word[0] > 0 else -1)
+    transposed, low_degree = _burau_square_power(burau_apply(*_burau_identity(n), word), power, lambda: word)
+    return transposed, low_degree + shift
+
 
+def _burau_square_power(square, power, word):
+    """
+    Burau matrix square**power by repeated squaring
+    :param word: function returning the letters of square, applied one by one once the coefficients outgrow int64
+    """
+    result = _burau_identity(square[0].shape[0] + 1)
+    done, step, remaining = 0, 1, power
+    while remaining:
+        if square[0].dtype == object:
+            # products of python integers are slow, apply the remaining letters one by one instead
+            result = burau_apply(*result, word() * (power - done))
+            break
+        if remaining & 1:
+            result = burau_product(result, square)
+            done += step
+        remaining >>= 1
+        if remaining:
+            square = burau_product(square, square)
+            step *= 2
+    return result
+
+
+def burau_product(left, right):
+    """
+    Burau matrix of a product of two braids from the Burau matrices of the factors, as polynomial matrix
+    multiplication over the powers of t present in right.
+    :param left: (coefficients, low_degree) of the first braid, see burau_coefficients
+    :param right: (coefficients, low_degree) of the second braid
+    :return: (coefficients, low_degree) of left times right, without zero powers at either end
+    """
+    (left, left_low), (right, right_low) = left, right
+    size, width = left.shape[0], left.shape[2]
+    powers = np.nonzero(right.any(axis=(0, 1)))[0]
+    dtype = np.int64
+    if object in (left.dtype, right.dtype) or \
+            int(np.abs(left).max()) * int(np.abs(right).max()) * size * min(width, len(powers)) >= 2**62:
+        dtype = object
+    # transposed, so the product is right^T left^T
+    product = np.zeros((size, size, width + right.shape[2] - 1), dtype=dtype)
+    for power in powers:
+        product[:, :, power:power + width] += np.tensordot(right[:, :, power].astype(dtype), left.astype(dtype),
+                                                           axes=(1, 0))
+    return _trim_powers(product, left_low + right_low)
+
+
+def _trim_powers(transposed, low_degree):
+    powers = np.nonzero(transposed.any(axis=(0, 1)))[0]
+    return transposed[:, :, powers[0]:powers[-1] + 1], low_degree + int(powers[0])
+
+
+@instrument.timed
+def burau_laurent(braid):
+    """
+    Reduced Burau matrix with LaurentPoly entries, see burau_coefficients.
+    :param braid: braid on at least two strands
+    :return: sparsedet.SparseMatrix
+    """
+    transposed, low_degree = burau_coefficients(braid)
+    size = braid.n_strands - 1
+    entries = {}
+    for row in range(size):
+        for col in range(size):
+            poly = LaurentPoly(transposed[col, row].tolist(), low_degree)
+            if poly:
+                entries[(row, col)] = poly
+    return sparsedet.SparseMatrix.from_indexed_values(entries, rows=size, cols=size)
+
+
+@instrument.timed
 def burau_rep(braid):
-    reps = _get_reduced_burau_matrices(braid.n_strands)
-    matrix = eye(braid.n_strands - 1)
-    for gen in braid:
-        matrix = matrix * reps[gen]
+    transposed, low_degree = burau_coefficients(braid)
+    size = braid.n_strands - 1
+    matrix = zeros(size, size)
+    for row in range(size):
+        for col in range(size):
+            powers = np.nonzero(transposed[col, row])[0]
+            matrix[row, col] = sympy.Add(*[int(transposed[col, row, k]) * t**int(k + low_degree) for k in powers])
     return matrix
 
+def burau_evaluate(burau, points, p):
+    """
+    Burau matrix evaluated at several values of t modulo a prime from its coefficients, like burau_mod.
+    :param burau: (coefficients, low_degree) as returned by burau_coefficients
+    :param points: values of t, non zero modulo p
+    :param p: prime below 2**31
+    :return: int64 array, [k, i, j] is entry j, i of the Burau matrix at t = points[k] modulo p
+    """
+    transposed, low_degree = burau
+    transposed = np.asarray(transposed % p, dtype=np.int64)
+    points = np.asarray(points, dtype=np.int64) % p
+    power = np.array([pow(int(point), low_degree, p) for point in points], dtype=np.int64)
+    values = np.zeros((len(points),) + transposed.shape[:2], dtype=np.int64)
+    for k in range(transposed.shape[2]):
+        values = (values + transposed[:, :, k] * power[:, None, None]) % p
+        power = power * points % p
+    return values
+
+
+def burau_mod(braid, points, p):
+    """
+    Reduced Burau matrix evaluated at several values of t modulo a prime, applying each letter as row updates as in
+    burau_coefficients.
+    :param braid: braid on at least two strands
+    :param points: values of t, non zero modulo p
+    :param p: prime below 2**31
+    :return: int64 array, [k, i, j] is entry j, i of the Burau matrix at t = points[k] modulo p
+    """
+    n = braid.n_strands
+    updates = _burau_row_updates(n)
+    points = np.asarray(points, dtype=np.int64) % p
+    powers = {-1: modular.inverse_mod(points, p), 0: np.ones_like(points), 1: points}
+    factors = {(sign, power): sign * powers[power] % p for sign in (-1, 1) for power in powers}
+
+    transposed = np.zeros((len(points), n - 1, n - 1), dtype=np.int64)
+    transposed[:, range(n - 1), range(n - 1)] = 1
+    for gen in braid:
+        row = abs(gen) - 1
+        old_row = transposed[:, row].copy()
+        for col, sign, power in updates[gen]:
+            shifted = old_row * factors[sign, power][:, None] % p
+            if col == row:
+                transposed[:, col] = shifted
+            else:
+                transposed[:, col] = (transposed[:, col] + shifted) % p
+    return transposed
+
+
+def burau_mod_batch(braids, points, p):
+    """
+    Reduced Burau matrices of several braids on the same number of strands evaluated at the same values of t
+    modulo a prime, as burau_mod. Words are padded to the same length and the letters at each position of all the
+    braids are applied together.
+    :param braids: braids on the same number of strands, at least two
+    :param points: values of t, non zero modulo p
+    :param p: prime below 2**31
+    :return: int64 array, [b, k, i, j] is entry j, i of the Burau matrix of braids[b] at t = points[k] modulo p
+    """
+    n = braids[0].n_strands
+    rows, signs, powers = _burau_update_table(n)
+    points = np.asarray(points, dtype=np.int64) % p
+    # factors[i + n - 1, d, k] is signs[i + n - 1, d] t^powers[i + n - 1, d] at points[k]
+    point_powers = np.stack([modular.inverse_mod(points, p), np.ones_like(points), points])
+    factors = signs[:, :, None] * point_powers[powers + 1] % p
+
+    letters = np.zeros((len(braids), max(len(braid) for braid in braids)), dtype=np.int64)
+    for b, braid in enumerate(braids):
+        assert braid.n_strands == n, "braids on {} and {} strands".format(n, braid.n_strands)
+        letters[b, :len(braid)] = list(braid)
+    letters += n - 1
+
+    transposed = np.zeros((len(braids), len(points), n - 1, n - 1), dtype=np.int64)
+    transposed[:, :, range(n - 1), range(n - 1)] = 1
+    batch = np.arange(len(braids))
+    for position in range(letters.shape[1]):
+        letter = letters[:, position]
+        row = rows[letter]
+        letter_factors = factors[letter]
+        old_row = transposed[batch, :, row]
+        transposed[batch, :, row] = old_row * letter_factors[:, 1, :, None] % p
+        for d in (0, 2):
+            # rows out of range only occur with a zero factor, so clipping them adds nothing
+            target = np.clip(row + d - 1, 0, n - 2)
+            transposed[batch, :, target] = (transposed[batch, :, target] +
+                                            old_row * letter_factors[:, d, :, None]) % p
+    return transposed
+
+
+def _closure_is_knot(braid):
+    perm = list(range(braid.n_strands))
+    for gen in braid:
+        i = abs(gen)
+        perm[i - 1], perm[i] = perm[i], perm[i - 1]
+    position, cycle_length = perm[0], 1
+    while position != 0:
+        position, cycle_length = perm[position], cycle_length + 1
+    return cycle_length == braid.n_strands
+
+
+def _alexander_values(braid, p, n_points, burau=None):
+    """
+    Values modulo p of det(I - B(t)) (1 - t) / (1 - t^n) at the n_points smallest points from 2 with t^n != 1.
+    Their products never reach p, so the values of t + 1/t are distinct too. The Burau matrix is evaluated from
+    burau, see burau_coefficients, if given, else letter by letter.
+    :return: (points, values), int64 arrays
+    """
+    n = braid.n_strands
+    points = _alexander_points(n, p, n_points)
+    burau_values = burau_mod(braid, points, p) if burau is None else burau_evaluate(burau, points, p)
+    matrices = (np.eye(n - 1, dtype=np.int64) - burau_values) % p
+    return points, _alexander_scale(modular.det_mod(matrices, p), points, n, p)
+
+
+def _alexander_points(n, p, n_points):
+    points = []
+    point = 2
+    while len(points) < n_points:
+        if pow(point, n, p) != 1:
+            points += [point]
+        point += 1
+    return np.array(points, dtype=np.int64)
+
+
+def _alexander_scale(values, points, n, p):
+    """
+    :return: values of det(I - B(t)) at points times (1 - t) / (1 - t^n), modulo p
+    """
+    values = values * ((1 - points) % p) % p
+    return values * modular.inverse_mod((1 - np.array([pow(int(point), n, p) for point in points])) % p, p) % p
+
+
+def _alexander_degrees(braid):
+    """
+    :return: (low, high, symmetric, n_points), the range of degrees of det(I - B(t)) (1 - t) / (1 - t^n), whether
+    it is symmetric, and the number of values needed to interpolate it, see _alexander_residues
+    """
+    low = -braid.expression().n_negative
+    high = len(braid) + low - braid.n_strands + 1
+    symmetric = _closure_is_knot(braid)
+    n_points = (high - low) // 2 + 1 if symmetric else high - low + 1
+    return low, high, symmetric, n_points
+
+
+def _alexander_residues(braid, p, burau=None):
+    """
+    Coefficients modulo p of the Laurent polynomial det(I - B(t)) (1 - t) / (1 - t^n), lowest degree first, by
+    evaluation and interpolation. Its degrees lie between minus the number of negative letters and the number of
+    positive letters minus n - 1. For knots it is symmetric about the centre of that range, so it is interpolated
+    as a polynomial in u = t + 1/t, which needs half as many points.
+    """
+    low, high, symmetric, n_points = _alexander_degrees(braid)
+    points, values = _alexander_values(braid, p, n_points, burau=burau)
+    return _interpolate_residues(points, values[None], [(low, high, symmetric, n_points)], p)[0]
+
+
+def _interpolate_residues(points, values, degrees, p):
+    """
+    Coefficients modulo p, lowest degree first, of Laurent polynomials from their values at points.
+    :param values: 2D array, row k the values of polynomial k at the first degrees[k][3] points
+    :param degrees: (low, high, symmetric, n_points) of each polynomial, see _alexander_degrees, all symmetric or
+    all not
+    :return: list of lists of coefficients
+    """
+    lows, highs, symmetric, lengths = (np.array(column) for column in zip(*degrees))
+    if not symmetric.any():
+        values = values * modular.power_mod(points, -lows[:, None], p) % p
+        return modular.interpolate(points, values, p, lengths=lengths)
+
+    values = values * modular.power_mod(points, -((lows + highs) // 2)[:, None], p) % p
+    inverses = modular.inverse_mod(points, p)
+    u_coefficients = modular.interpolate((points + inverses) % p, values, p, lengths=lengths)
+    # expand the polynomials in t + 1/t by Horner's rule, all about the same constant term at index half_width
+    half_width = len(points) - 1
+    coefficients = np.zeros((len(degrees), 2 * half_width + 1), dtype=np.int64)
+    padded = np.zeros((len(degrees), len(points)), dtype=np.int64)
+    for row, row_coefficients in enumerate(u_coefficients):
+        padded[row, :len(row_coefficients)] = row_coefficients
+    for i in range(len(points) - 1, -1, -1):
+        expanded = np.zeros_like(coefficients)
+        expanded[:, 1:] += coefficients[:, :-1]
+        expanded[:, :-1] += coefficients[:, 1:]
+        expanded[:, half_width] += padded[:, i]
+        coefficients = np.where((i < lengths)[:, None], expanded % p, coefficients)
+    return [row[half_width - length + 1:half_width + length].tolist() for row, length in zip(coefficients, lengths)]
+
+
+@instrument.timed(name="invariants.normalise")
+def _as_output(alex_poly, as_sympy):
+    if as_sympy:
+        return alex_poly.to_pure_poly(t)
+    return alex_poly
+
+
+@instrument.timed
+def interpolate_alexander(braid, as_sympy=True):
+    """
+    Alexander polynomial of the closure of braid from modular evaluations of the Burau matrix, interpolation, and
+    Chinese remaindering over several primes. Normalised as in burau_to_alexander.
+    :param braid: braid on at least two strands
+    :param as_sympy: return a sympy PurePoly rather than a LaurentPoly
+    :return: sympy PurePoly in t, or LaurentPoly
+    """
+    if len(braid) < braid.n_strands - 1:
+        return _as_output(LaurentPoly(), as_sympy)
+    coefficients = modular.reconstruct(lambda p: _alexander_residues(braid, p))
+    return _as_output(LaurentPoly(coefficients).normalise(), as_sympy)
+
+
+# largest number of int64 entries of the stacked Burau matrices evaluated at once by batch_alexander
+_BATCH_ENTRIES = 2**22
+
+
+def _groups(indices, key, size):
+    """
+    Splits indices into groups with the same key, sorted by size within each and cut into chunks of at most
+    _BATCH_ENTRIES / size(first index in the chunk) indices, so braids of similar size are batched together.
+    """
+    by_key = {}
+    for index in indices:
+        by_key.setdefault(key(index), []).append(index)
+    for group in by_key.values():
+        group.sort(key=size, reverse=True)
+        start = 0
+        while start < len(group):
+            stop = start + max(1, _BATCH_ENTRIES // max(size(group[start]), 1))
+            yield group[start:stop]
+            start = stop
+
+
+@instrument.timed
+def batch_alexander(braids, as_sympy=True):
+    """
+    Alexander polynomials of many braids as interpolate_alexander, with the braids grouped by number of strands
+    and length so that each group is evaluated modulo each prime by one burau_mod_batch and one det_mod over the
+    stacked matrices of all its braids and points.
+    :param braids: list of braids on at least two strands
+    :param as_sympy: return sympy PurePolys rather than LaurentPolys
+    :return: list of the Alexander polynomials, in the order of braids
+    """
+    polys = [None] * len(braids)
+    degrees = {}
+    for index, braid in enumerate(braids):
+        if len(braid) < braid.n_strands - 1:
+            polys[index] = LaurentPoly()
+        else:
+            degrees[index] = _alexander_degrees(braid)
+
+    def size(index):
+        return degrees[index][3] * (braids[index].n_strands - 1)**2
+
+    for group in _groups(degrees, lambda index: braids[index].n_strands, size):
+        n = braids[group[0]].n_strands
+        n_points = max(degrees[index][3] for index in group)
+        residues = {}
+        pending = set(group)
+
+        def group_residues(p):
+            # residues of every braid of the group not yet reconstructed, computed once per prime
+            if p not in residues:
+                indices = sorted(pending)
+                points = _alexander_points(n, p, n_points)
+                burau_values = burau_mod_batch([braids[index] for index in indices], points, p)
+                matrices = (np.eye(n - 1, dtype=np.int64) - burau_values).reshape((-1, n - 1, n - 1)) % p
+                values = modular.det_mod(matrices, p).reshape((len(indices), n_points))
+                values = _alexander_scale(values, points, n, p)
+                residues[p] = {}
+                for symmetric in (False, True):
+                    rows = [row for row, index in enumerate(indices) if degrees[index][2] == symmetric]
+                    if rows:
+                        part = [indices[row] for row in rows]
+                        part_degrees = [degrees[index] for index in part]
+                        residues[p].update(zip(part, _interpolate_residues(points, values[rows], part_degrees, p)))
+            return residues[p]
+
+        for index in group:
+            coefficients = modular.reconstruct(lambda p: group_residues(p)[index])
+            polys[index] = LaurentPoly(coefficients).normalise()
+            pending.discard(index)
+    return [_as_output(poly, as_sympy) for poly in polys]
+
+
+def _nonzero_det(coefficient_matrix):
+    dense = [[int(value) for value in row] for row in coefficient_matrix]
+    matrix = sparsedet.SparseMatrix.from_list_of_lists(dense, rows=len(dense), cols=len(dense))
+    return sparsedet.determinant(matrix) != 0
+
+
+def burau_degree_bounds(braid, burau=None):
+    """
+    Bounds on the lowest and highest powers of t in det(I - B(t)), from the lowest and highest powers in each row
+    and each column. The coefficient of the highest possible power is the determinant of the matrix of coefficients
+    at the highest power of each row (or column), and likewise for the lowest, so the bounds are exact whenever that
+    determinant is non zero.
+    :param braid: braid on at least two strands
+    :param burau: its Burau matrix as returned by burau_coefficients, if already known, e.g. from a BurauTree
+    :return: (low, high, low_exact, high_exact), or None when a row of I - B(t) is zero and the determinant is 0
+    """
+    transposed, low_degree = burau_coefficients(braid) if burau is None else burau
+    size = braid.n_strands - 1
+    if low_degree > 0 or low_degree + transposed.shape[2] <= 0:
+        # make room for the identity
+        below, above = max(low_degree, 0), max(1 - low_degree - transposed.shape[2], 0)
+        transposed = np.pad(transposed, ((0, 0), (0, 0), (below, above)))
+        low_degree -= below
+    coefficients = -transposed.transpose(1, 0, 2)
+    coefficients[range(size), range(size), -low_degree] += 1
+    non_zero = coefficients != 0
+
+    low, high = None, None
+    low_exact, high_exact = False, False
+    for axis in (1, 0):
+        present = non_zero.any(axis=axis)
+        if not present.any(axis=1).all():
+            return None
+        lows = present.argmax(axis=1)
+        highs = present.shape[1] - 1 - present[:, ::-1].argmax(axis=1)
+        lines = np.arange(size)
+        if axis == 1:
+            bottom, top = coefficients[lines, :, lows], coefficients[lines, :, highs]
+        else:
+            bottom, top = coefficients[:, lines, lows].T, coefficients[:, lines, highs].T
+        line_low = int(lows.sum()) + size * low_degree
+        line_high = int(highs.sum()) + size * low_degree
+        if low is None or line_low > low or (line_low == low and not low_exact):
+            low, low_exact = line_low, _nonzero_det(bottom)
+        if high is None or line_high < high or (line_high == high and not high_exact):
+            high, high_exact = line_high, _nonzero_det(top)
+    return low, high, low_exact, high_exact
+
+
+def alexander_degree_bounds(braid, p=None, burau=None):
+    """
+    Lower and upper bounds on the breadth of the Alexander polynomial, which is the degree of the normalised
+    polynomial. The upper bound comes from burau_degree_bounds, and dividing det(I - B(t)) (1 - t) by 1 - t^n
+    lowers the breadth by n - 1. The lower bound is the breadth of the polynomial modulo one prime, which can only
+    lose coefficients.
+    :param braid: braid on at least two strands
+    :param p: prime below 2**31 for the lower bound, modular.prime(0) if None, or False to skip it
+    :param burau: see burau_degree_bounds
+    :return: (lower, upper), both -inf for the zero polynomial
+    """
+    n = braid.n_strands
+    if len(braid) < n - 1:
+        return float("-inf"), float("-inf")
+    bounds = burau_degree_bounds(braid, burau=burau)
+    if bounds is None:
+        return float("-inf"), float("-inf")
+    low, high, low_exact, high_exact = bounds
+    upper = min(high - low, len(braid)) - (n - 1)
+    if low_exact and high_exact:
+        return upper, upper
+    if p is False:
+        return float("-inf"), upper
+    return _modular_breadth(braid, p, burau=burau), upper
+
+
+def _modular_breadth(braid, p=None, burau=None):
+    residues = _alexander_residues(braid, modular.prime(0) if p is None else p, burau=burau)
+    non_zero = [k for k, residue in enumerate(residues) if residue != 0]
+    return non_zero[-1] - non_zero[0] if non_zero else float("-inf")
+
+
+def _knot_degree_exceeds(braid, half_degree, p=None, burau=None):
+    """
+    For a knot, t^-centre times the Alexander polynomial is R(t + 1/t) for a polynomial R of half its degree. If R
+    has degree at most half_degree, its interpolant through half_degree + 2 values has no term of degree
+    half_degree + 1, so a non zero top coefficient modulo p proves the degree exceeds 2 * half_degree.
+    :return: True if the degree of the Alexander polynomial is certainly above 2 * half_degree
+    """
+    p = modular.prime(0) if p is None else p
+    n = braid.n_strands
+    low = -braid.expression().n_negative
+    centre = (2 * low + len(braid) - n + 1) // 2
+    points, values = _alexander_values(braid, p, half_degree + 2, burau=burau)
+    values = [int(value) * pow(int(point), -centre, p) % p for value, point in zip(values, points)]
+    u_coefficients = modular.interpolate((points + modular.inverse_mod(points, p)) % p, values, p)
+    return u_coefficients[-1] != 0
+
+
+@instrument.timed
+def alexander_degree_below(braid, bound, burau=None):
+    """
+    Decides whether the breadth of the Alexander polynomial is below bound, in stages that stop as soon as the
+    answer is known: the row and column degree bounds of the Burau matrix, for knots a few values modulo a prime
+    (see _knot_degree_exceeds), the whole polynomial modulo one prime, and only then interpolate_alexander.
+    :param braid: braid on at least two strands
+    :param bound: number to compare the degree to
+    :param burau: see burau_degree_bounds
+    :return: (below, lower, upper, stage) with lower and upper the bounds on the degree known when stage, one of
+    "burau", "evaluation", "modular" or "full", decided
+    """
+    lower, upper = alexander_degree_bounds(braid, p=False, burau=burau)
+    if upper < bound or lower == upper:
+        return upper < bound, lower, upper, "burau"
+    # knots have even degree, below bound exactly when half the degree is at most half_degree
+    half_degree = ceil(bound / 2) - 1
+    if half_degree >= 0 and 2 * half_degree + 2 <= upper and _closure_is_knot(braid):
+        if _knot_degree_exceeds(braid, half_degree, burau=burau):
+            return False, 2 * half_degree + 2, upper, "evaluation"
+    lower = _modular_breadth(braid, burau=burau)
+    if lower >= bound or lower == upper:
+        return lower < bound, lower, upper, "modular"
+    alex_poly = interpolate_alexander(braid, as_sympy=False)
+    degree = alex_poly.degree() if alex_poly else float("-inf")
+    return degree < bound, degree, degree, "full"
+
+
 def _normalise_laurent(polynomial, symbol):
     """
     multiplies laurent polynomial by +/- symbol^n so it has no negative powers of symbol, and non zero positive constant
     :param polynomial: sympy Poly or PurePoly
     :param symbol: sympy symbol
-    :return: normalised polynomial, sympy Poly or PurePoly
+    :return: normalised polynomial, sympy Poly
     """
-    polynomial = polynomial.as_poly(t, 1/t)
-    negative_degree = polynomial.degree(1/symbol)
-    polynomial = (polynomial.as_expr() * symbol**negative_degree).as_poly(symbol)
-    if negative_degree == 0:
-        min_degree = min([mono[0] for mono in polynomial.monoms()])
-        polynomial = (polynomial.as_expr() * symbol**(-min_degree)).as_poly(symbol)
+    polynomial = LaurentPoly.from_sympy(polynomial, symbol).normalise()
+    return sympy.Poly(polynomial.to_sympy(symbol), symbol)
+
+
+def _to_sparse(matrix):
+    if isinstance(matrix, sparsedet.SparseMatrix):
+        return matrix
+    n, m = matrix.shape
+    return sparsedet.SparseMatrix.from_list_of_lists(
+        [[int(value) for value in row] for row in matrix.tolist()], rows=n, cols=m)
 
-    if polynomial.nth(0) < 0:
-        polynomial = - polynomial
-    return polynomial
 
+def _laurent_matrix(matrix):
+    """
+    :param matrix: sympy matrix of Laurent polynomials in t, or SparseMatrix with int or LaurentPoly entries
+    :return: SparseMatrix with LaurentPoly entries
+    """
+    if isinstance(matrix, sparsedet.SparseMatrix):
+        entries = matrix.index_value_dict()
+    else:
+        entries = {(row, col): matrix[row, col] for row in range(matrix.rows) for col in range(matrix.cols)}
+    entries = {index: LaurentPoly.from_sympy(value) for index, value in entries.items() if value != 0}
+    return sparsedet.SparseMatrix.from_indexed_values(entries, rows=matrix.shape[0], cols=matrix.shape[1])
 
-def burau_to_alexander(matrix):
+
+@instrument.timed
+def burau_to_alexander(matrix, as_sympy=True, det_method=None):
+    """
+    Alexander polynomial det(I - B(t)) (1 - t) / (1 - t^n) from the reduced Burau matrix, by exact elimination
+    over Laurent polynomials. Normalised with no negative powers of t and a positive constant term.
+    :param matrix: reduced Burau matrix, sympy matrix or SparseMatrix of LaurentPoly, see burau_laurent
+    :param as_sympy: return a sympy PurePoly rather than a LaurentPoly
+    :param det_method: method of sparsedet.determinant
+    :return: sympy PurePoly in t, or LaurentPoly
+    """
     a, b = matrix.shape
     n = a + 1
-    matrix = eye(a) - matrix
-    matrix = matrix.expand()
-    alex_poly = matrix.det()
-    alex_poly = alex_poly * (1 - t)
-    alex_poly = _normalise_laurent(alex_poly, t)
-    alex_poly = pexquo(alex_poly.as_expr(), ( 1 - t**n)).expand()
-    alex_poly = PurePoly(alex_poly, t)
-    if alex_poly.nth(0) < 0:
-        alex_poly = - alex_poly
-    return alex_poly
+    matrix = _laurent_matrix(matrix)
+    entries = {index: -value for index, value in matrix.index_value_dict().items()}
+    for i in range(a):
+        entries[(i, i)] = entries.get((i, i), 0) + 1
+    entries = {index: LaurentPoly.from_sympy(value) for index, value in entries.items() if value != 0}
+    matrix = sparsedet.SparseMatrix.from_indexed_values(entries, rows=a, cols=a)
+    alex_poly = sparsedet.determinant(matrix, one=LaurentPoly((1,)), method=det_method)
+    alex_poly = (alex_poly * LaurentPoly((1, -1))).exquo(LaurentPoly((1,) + (0,) * (n - 1) + (-1,)))
+    return _as_output(alex_poly.normalise(), as_sympy)
 
 
 def decompose_poly_matrix(poly_matrix):
-    poly_matrix = sympy.Matrix(poly_matrix)
-    rows = poly_matrix.rows
-    cols = poly_matrix.cols
+    """
+    Splits a matrix of Laurent polynomials by powers of t.
+    :param poly_matrix: sympy matrix, or SparseMatrix of LaurentPoly
+    :return: dictionary "matrix_dict" with matrix_dict[k] the integer SparseMatrix of coefficients of t^k
+    """
+    poly_matrix = _laurent_matrix(poly_matrix)
+    rows, cols = poly_matrix.shape
     matrix_dict = {}
-
-    for row in range(rows):
-        for col in range(cols):
-            poly = sympy.PurePoly(poly_matrix[row,col],t,1/t)
-            for degrees, coeff in zip(poly.monoms(), poly.coeffs()):
-                assert degrees[0] == 0 or degrees[1] == 0, "mixed expression!!"
-                if degrees[0] > 0:
-                    degree = degrees[0]
-                elif degrees[1] > 0:
-                    degree = - degrees[1]
-                else:
-                    degree = 0
-                if not degree in matrix_dict.keys():
-                    matrix_dict[degree] = zeros(rows, cols)
-
-                matrix_dict[degree][row, col] = coeff
+    for (row, col), poly in poly_matrix.index_value_dict().items():
+        for k, coefficient in enumerate(poly.coefficients):
+            if coefficient != 0:
+                if poly.offset + k not in matrix_dict:
+                    matrix_dict[poly.offset + k] = sparsedet.SparseMatrix.zeros(rows, cols)
+                matrix_dict[poly.offset + k][row, col] = coefficient
     return matrix_dict
 
-def min_max_deg_degrees(poly_matrix):
+def min_max_deg_degrees(poly_matrix, det_method=None):
     matrix_dict = decompose_poly_matrix(poly_matrix)
     degrees = sorted(matrix_dict.keys())
     for degree in degrees:
-        det = matrix_dict[degree].det()
+        det = sparsedet.determinant(matrix_dict[degree], method=det_method)
         if det != 0:
             min_degree = degree
             break
     for degree in degrees[::-1]:
-        det = matrix_dict[degree].det()
+        det = sparsedet.determinant(matrix_dict[degree], method=det_method)
         if det != 0:
             max_degree = degree
             break
     return min_degree, max_degree
 
 
-def seifert_to_alexander(seifert_matrix):
+@instrument.timed
+def seifert_to_alexander(seifert_matrix, as_sympy=True, det_method=None):
+    """
+    Alexander polynomial det(t V - V^T), by exact elimination over Z[t, 1/t]. Normalised like
+    burau_to_alexander, with no negative powers of t and a positive constant term.
+    :param seifert_matrix: SparseMatrix or sympy matrix
+    :param as_sympy: return a sympy PurePoly rather than a LaurentPoly
+    :param det_method: method of sparsedet.determinant
+    :return: sympy PurePoly in t, or LaurentPoly
+    """
     n, m = seifert_matrix.shape
     assert n == m, "non square matrix received"
-    matrix = SparseMatrix(t * seifert_matrix - seifert_matrix.transpose())
-    alex_poly = t**(-n//2) * matrix.det(method = "berkowitz")
-    alex_poly = PurePoly(sympy.expand(alex_poly))
-    return alex_poly
+    seifert_matrix = _to_sparse(seifert_matrix)
+    entries = {}
+    for (i, j), value in seifert_matrix.index_value_dict().items():
+        entries[(i, j)] = entries.get((i, j), 0) + LaurentPoly.monomial(value, 1)
+        entries[(j, i)] = entries.get((j, i), 0) - value
+    entries = {index: LaurentPoly.from_sympy(value) for index, value in entries.items() if value != 0}
+    matrix = sparsedet.SparseMatrix.from_indexed_values(entries, rows=n, cols=n)
+    alex_poly = sparsedet.determinant(matrix, one=LaurentPoly((1,)), method=det_method)
+    return _as_output(alex_poly.normalise(), as_sympy)
 
 
+@instrument.timed
+def knot_determinant(seifert_matrix, det_method=None):
+    """
+    Determinant of the closure, |det(V + V^T)| = |alexander(-1)|.
+    :param seifert_matrix: SparseMatrix or sympy matrix
+    :param det_method: method of sparsedet.determinant
+    :return: int
+    """
+    n, m = seifert_matrix.shape
+    assert n == m, "non square matrix received"
+    seifert_matrix = _to_sparse(seifert_matrix)
+    return abs(sparsedet.determinant(seifert_matrix + seifert_matrix.transpose(), method=det_method))
+
+
+@instrument.timed
 def signature(seifert_matrix):
     n, m = seifert_matrix.shape
     assert n == m, "non square matrix received"
+    seifert_matrix = _to_sparse(seifert_matrix)
     matrix = seifert_matrix + seifert_matrix.transpose()
-    characteristic_poly = matrix.charpoly(t)
-    #remove 0 eigenvalues
-    while characteristic_poly.nth(0) == 0:
-        characteristic_poly = pexquo(characteristic_poly, PurePoly(t))
-
-    sig = characteristic_poly.degree(t)
-    negative_root_intervals = characteristic_poly.intervals(sup=0)
-    for interval, multiplicity in negative_root_intervals:
-        assert interval[1] <= 0, ("Error in signature computation, root of characteristic equation was not isolated" +
-                                  " correctly below zero. Could be a sympy version problem (working in 1.7.1).")
-        sig += -2 * multiplicity
-    return sig
+    positive, negative, zero = sparsedet.symmetric_inertia(matrix)
+    return positive - negative
+
+
+# largest Seifert matrix batch_signature diagonalises numerically, larger ones are left to symmetric_inertia
+_DENSE_SIGNATURE_SIZE = 300
+
+
+@instrument.timed
+def batch_signature(braids):
+    """
+    Signatures of many braids. The symmetrised Seifert matrices of equal size are stacked and their eigenvalues
+    found together in floating point. Those are within size * ||A||_F * 2^-40 of the true eigenvalues, far above
+    the rounding error, so when none is closer than that to zero the signs of all of them are certain. Otherwise,
+    or for large matrices, the signature is computed exactly by signature.
+    :param braids: list of braids
+    :return: list of signatures, in the order of braids
+    """
+    matrices = []
+    for braid in braids:
+        matrix = seifert_matrix(braid)
+        matrices += [matrix + matrix.transpose()]
+    signatures = [None] * len(braids)
+    by_size = {}
+    for index, matrix in enumerate(matrices):
+        if 0 < matrix.rows <= _DENSE_SIGNATURE_SIZE:
+            by_size.setdefault(matrix.rows, []).append(index)
+        elif matrix.rows == 0:
+            signatures[index] = 0
+    for size, indices in by_size.items():
+        stacked = np.zeros((len(indices), size, size))
+        for position, index in enumerate(indices):
+            for (row, col), value in matrices[index].index_value_dict().items():
+                stacked[position, row, col] = value
+        eigenvalues = np.linalg.eigvalsh(stacked)
+        tolerance = size * np.sqrt((stacked**2).sum(axis=(1, 2))) * 2.0**-40
+        certain = (np.abs(eigenvalues) > tolerance[:, None]).all(axis=1)
+        for position, index in enumerate(indices):
+            if certain[position]:
+                signatures[index] = int((eigenvalues[position] > 0).sum() - (eigenvalues[position] < 0).sum())
+    for index, matrix in enumerate(matrices):
+        if signatures[index] is None:
+            positive, negative, zero = sparsedet.symmetric_inertia(matrix)
+            signatures[index] = positive - negative
+    return signatures
+
+
+def unit_circle_roots(alex_poly):
+    """
+    Roots of an Alexander polynomial on the upper half of the unit circle, the jump points of the Levine-Tristram
+    signature function. A symmetric polynomial of degree 2d is t^d R(t + 1/t), so they are exactly
+    (x + i sqrt(4 - x^2)) / 2 for the real roots x of R with -2 <= x <= 2.
+    :param alex_poly: sympy PurePoly in t, normalised as by burau_to_alexander
+    :return: list of exact sympy expressions, by increasing argument, empty if alex_poly vanishes as for split
+    links, which have no jump points
+    """
+    polynomial = sympy.Poly(alex_poly.as_expr(), t)
+    roots = []
+    if polynomial.is_zero:
+        return roots
+    # an antisymmetric polynomial, as for some links, vanishes at t = 1
+    while not polynomial.is_zero and polynomial.all_coeffs() != polynomial.all_coeffs()[::-1]:
+        quotient, remainder = sympy.div(polynomial, sympy.Poly(t - 1, t))
+        if not remainder.is_zero or (-polynomial).all_coeffs() != polynomial.all_coeffs()[::-1]:
+            raise ValueError("{} is not symmetric".format(alex_poly))
+        polynomial = quotient
+        if not roots:
+            roots += [sympy.Integer(1)]
+
+    coeffs = polynomial.all_coeffs()[::-1]
+    half = (len(coeffs) - 1) // 2
+    x = sympy.Symbol("x")
+    # t^k + t^-k = D_k(t + 1/t) with D_0 = 2, D_1 = x, D_(k+1) = x D_k - D_(k-1)
+    dickson = [sympy.Poly(2, x), sympy.Poly(x, x)]
+    for k in range(2, half + 1):
+        dickson += [dickson[-1] * sympy.Poly(x, x) - dickson[-2]]
+    reduced = sympy.Poly(coeffs[half], x)
+    for k in range(1, half + 1):
+        reduced += coeffs[half + k] * dickson[k]
+
+    real_roots = sorted(set(sympy.real_roots(reduced)), reverse=True)
+    for root in real_roots:
+        if -2 <= root <= 2:
+            roots += [(root + sympy.I * sympy.sqrt(4 - root**2)) / 2]
+    return roots
+
+
+def tristram_levine(seifert_matrix, omegas, jumps=(), tol=1e-8):
+    """
+    Levine-Tristram signatures, the signatures of the Hermitian forms (1 - w) V + (1 - conj(w)) V^T, for a whole
+    vector of unit complex numbers w at once, with a single batched eigvalsh.
+    :param seifert_matrix: Seifert matrix V, a SparseMatrix or sympy matrix
+    :param omegas: unit complex numbers
+    :param jumps: exact jump points, see unit_circle_roots. Any omega within tol of one, or of its conjugate, is
+    evaluated at the jump point itself, where the form is degenerate.
+    :param tol: eigenvalues smaller than tol times the norm of the form count as zero
+    :return: numpy int array of signatures, in the order of omegas
+    """
+    n, m = seifert_matrix.shape
+    assert n == m, "non square matrix received"
+    omegas = np.array(omegas, dtype=complex).ravel()
+    if n == 0:
+        return np.zeros(len(omegas), dtype=int)
+    if isinstance(seifert_matrix, sparsedet.SparseMatrix):
+        seifert_matrix = seifert_matrix.to_dense()
+    else:
+        seifert_matrix = seifert_matrix.tolist()
+    matrix = np.array(seifert_matrix, dtype=float)
+
+    for jump in jumps:
+        jump = complex(jump.evalf(30))
+        for target in (jump, jump.conjugate()):
+            omegas[np.abs(omegas - target) < tol] = target
 
+    forms = ((1 - omegas)[:, None, None] * matrix[None] +
+             (1 - omegas.conjugate())[:, None, None] * matrix.T[None])
+    eigenvalues = np.linalg.eigvalsh(forms)
+    threshold = tol * np.maximum(np.abs(eigenvalues).max(axis=1, keepdims=True), 1)
+    return (eigenvalues > threshold).sum(axis=1) - (eigenvalues < -threshold).sum(axis=1)
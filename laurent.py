@@ -0,0 +1,251 @@
+from fractions import Fraction
+
+import sympy
+from sympy.abc import t
+
+
+def _strip(coefficients, offset):
+    start = 0
+    while start < len(coefficients) and coefficients[start] == 0:
+        start += 1
+    stop = len(coefficients)
+    while stop > start and coefficients[stop - 1] == 0:
+        stop -= 1
+    if start == stop:
+        return (), 0
+    return tuple(coefficients[start:stop]), offset + start
+
+
+class LaurentPoly:
+    """
+    Laurent polynomial in t with integer coefficients, coefficients[k] is the coefficient of t^(offset + k).
+    Coefficients are kept without zeros at either end, so the zero polynomial has no coefficients and offset 0.
+    """
+    __slots__ = ("coefficients", "offset")
+
+    def __init__(self, coefficients=(), offset=0):
+        self.coefficients, self.offset = _strip([int(coefficient) for coefficient in coefficients], offset)
+
+    @classmethod
+    def _from_stripped(cls, coefficients, offset):
+        poly = cls.__new__(cls)
+        poly.coefficients, poly.offset = _strip(coefficients, offset)
+        return poly
+
+    @classmethod
+    def monomial(cls, coefficient, power):
+        return cls((coefficient,), power)
+
+    @classmethod
+    def from_sympy(cls, expression, symbol=t):
+        """
+        :param expression: sympy expression, Poly or PurePoly, polynomial in symbol and 1/symbol
+        :return: LaurentPoly
+        """
+        if isinstance(expression, LaurentPoly):
+            return expression
+        if isinstance(expression, int):
+            return cls((expression,))
+        if isinstance(expression, sympy.Poly):
+            expression = expression.as_expr()
+        poly = sympy.Poly(sympy.expand(expression), symbol, 1/symbol)
+        terms = {monom[0] - monom[1]: int(coefficient) for monom, coefficient in poly.terms()}
+        if not terms:
+            return cls()
+        low = min(terms)
+        coefficients = [0] * (max(terms) - low + 1)
+        for power, coefficient in terms.items():
+            coefficients[power - low] += coefficient
+        return cls._from_stripped(coefficients, low)
+
+    def to_sympy(self, symbol=t):
+        """
+        :return: sympy expression in symbol
+        """
+        return sympy.Add(*[coefficient * symbol**(self.offset + k)
+                           for k, coefficient in enumerate(self.coefficients) if coefficient != 0])
+
+    def to_pure_poly(self, symbol=t):
+        """
+        :return: sympy PurePoly in symbol, only defined without negative powers
+        """
+        if not self.coefficients:
+            return sympy.PurePoly(0, symbol)
+        assert self.offset >= 0, "negative powers of {} in {}".format(symbol, self)
+        return sympy.PurePoly(list(self.coefficients[::-1]) + [0] * self.offset, symbol)
+
+    def low_degree(self):
+        return self.offset
+
+    def high_degree(self):
+        return self.offset + len(self.coefficients) - 1
+
+    def degree(self):
+        """
+        Breadth of the Laurent polynomial, the difference between the highest and lowest powers of t.
+        """
+        return max(len(self.coefficients) - 1, 0)
+
+    def nth(self, power):
+        if self.offset <= power < self.offset + len(self.coefficients):
+            return self.coefficients[power - self.offset]
+        return 0
+
+    def shift(self, power):
+        """
+        :return: self times t^power
+        """
+        if not self.coefficients:
+            return self
+        return LaurentPoly._from_stripped(self.coefficients, self.offset + power)
+
+    def normalise(self):
+        """
+        :return: +/- t^n times self, with lowest power 0 and positive constant term
+        """
+        if not self.coefficients:
+            return self
+        if self.coefficients[0] < 0:
+            return LaurentPoly._from_stripped(tuple(-coefficient for coefficient in self.coefficients), 0)
+        return LaurentPoly._from_stripped(self.coefficients, 0)
+
+    def __call__(self, value, p=None):
+        """
+        Evaluates at t = value, by Horner's rule. Integers are evaluated exactly, as a Fraction if there are
+        negative powers, or modulo p if it is given.
+        """
+        result = 0
+        for coefficient in reversed(self.coefficients):
+            result = result * value + coefficient
+        if p is not None:
+            return result * pow(value, self.offset, p) % p
+        if self.offset >= 0:
+            return result * value**self.offset
+        if isinstance(value, int):
+            return Fraction(result, value**-self.offset)
+        return result / value**-self.offset
+
+    def __bool__(self):
+        return bool(self.coefficients)
+
+    def __eq__(self, other):
+        if isinstance(other, int):
+            other = LaurentPoly((other,))
+        if not isinstance(other, LaurentPoly):
+            return NotImplemented
+        return self.offset == other.offset and self.coefficients == other.coefficients
+
+    def __hash__(self):
+        if not self.coefficients:
+            return hash(0)
+        if self.offset == 0 and len(self.coefficients) == 1:
+            return hash(self.coefficients[0])
+        return hash((self.coefficients, self.offset))
+
+    def __repr__(self):
+        return "LaurentPoly({}, offset={})".format(list(self.coefficients), self.offset)
+
+    def __str__(self):
+        return str(self.to_sympy())
+
+    def __neg__(self):
+        return LaurentPoly._from_stripped(tuple(-coefficient for coefficient in self.coefficients), self.offset)
+
+    def __add__(self, other):
+        if isinstance(other, int):
+            other = LaurentPoly((other,))
+        if not isinstance(other, LaurentPoly):
+            return NotImplemented
+        if not other.coefficients:
+            return self
+        if not self.coefficients:
+            return other
+        low = min(self.offset, other.offset)
+        high = max(self.high_degree(), other.high_degree())
+        coefficients = [0] * (high - low + 1)
+        for poly in (self, other):
+            start = poly.offset - low
+            for k, coefficient in enumerate(poly.coefficients):
+                coefficients[start + k] += coefficient
+        return LaurentPoly._from_stripped(coefficients, low)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, int):
+            other = LaurentPoly((other,))
+        if not isinstance(other, LaurentPoly):
+            return NotImplemented
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if isinstance(other, int):
+            if other == 0:
+                return LaurentPoly()
+            return LaurentPoly._from_stripped(tuple(coefficient * other for coefficient in self.coefficients),
+                                              self.offset)
+        if not isinstance(other, LaurentPoly):
+            return NotImplemented
+        if not self.coefficients or not other.coefficients:
+            return LaurentPoly()
+        if len(other.coefficients) == 1:
+            return (self * other.coefficients[0]).shift(other.offset)
+        if len(self.coefficients) == 1:
+            return (other * self.coefficients[0]).shift(self.offset)
+        coefficients = [0] * (len(self.coefficients) + len(other.coefficients) - 1)
+        for i, left in enumerate(self.coefficients):
+            if left == 0:
+                continue
+            for j, right in enumerate(other.coefficients):
+                coefficients[i + j] += left * right
+        return LaurentPoly._from_stripped(coefficients, self.offset + other.offset)
+
+    __rmul__ = __mul__
+
+    def __pow__(self, power):
+        assert isinstance(power, int) and power >= 0, "can only raise to non negative integer powers"
+        result = LaurentPoly((1,))
+        base = self
+        while power:
+            if power & 1:
+                result = result * base
+            base = base * base
+            power >>= 1
+        return result
+
+    def exquo(self, other):
+        """
+        Exact division, by long division from the highest power.
+        :raises ArithmeticError: if other does not divide self
+        """
+        if isinstance(other, int):
+            other = LaurentPoly((other,))
+        if not other.coefficients:
+            raise ZeroDivisionError("division by the zero polynomial")
+        if not self.coefficients:
+            return self
+        divisor = other.coefficients
+        lead = divisor[-1]
+        remainder = list(self.coefficients)
+        n_quotient = len(remainder) - len(divisor) + 1
+        if n_quotient <= 0:
+            raise ArithmeticError("{} does not divide {}".format(other, self))
+        quotient = [0] * n_quotient
+        for k in range(n_quotient - 1, -1, -1):
+            value = remainder[k + len(divisor) - 1]
+            if value == 0:
+                continue
+            if value % lead != 0:
+                raise ArithmeticError("{} does not divide {}".format(other, self))
+            factor = value // lead
+            quotient[k] = factor
+            for j, coefficient in enumerate(divisor):
+                remainder[k + j] -= factor * coefficient
+        if any(remainder):
+            raise ArithmeticError("{} does not divide {}".format(other, self))
+        return LaurentPoly._from_stripped(quotient, self.offset - other.offset)
+
+    __floordiv__ = exquo
@@ -0,0 +1,305 @@
+from math import isqrt
+
+import numpy as np
+
+# primes below 2**31, so products of two residues fit in an int64
+_PRIME_BITS = 31
+_primes = []
+
+
+def _is_prime(n):
+    if n < 2:
+        return False
+    i = 2
+    while i * i <= n:
+        if n % i == 0:
+            return False
+        i += 1
+    return True
+
+
+def prime(k):
+    """
+    :return: k-th largest prime below 2**31
+    """
+    candidate = _primes[-1] - 2 if _primes else 2**_PRIME_BITS - 1
+    while len(_primes) <= k:
+        if _is_prime(candidate):
+            _primes.append(candidate)
+        candidate -= 2
+    return _primes[k]
+
+
+def inverse_mod(values, p):
+    """
+    Elementwise inverse modulo p of an int64 array of non zero residues, by Fermat's little theorem.
+    :param p: prime, or int64 array of primes broadcasting against values
+    """
+    result = np.ones_like(values)
+    base = values % p
+    if np.ndim(p) == 0:
+        exponent = p - 2
+        while exponent:
+            if exponent & 1:
+                result = result * base % p
+            base = base * base % p
+            exponent >>= 1
+        return result
+    exponent = np.broadcast_to(p - 2, np.shape(values))
+    while exponent.any():
+        result = np.where(exponent & 1, result * base % p, result)
+        base = base * base % p
+        exponent = exponent >> 1
+    return result
+
+
+def det_mod(matrices, p):
+    """
+    Determinants modulo p of a stack of square matrices, by Gaussian elimination run on the whole stack at once.
+    :param matrices: int64 array of shape (batch, n, n) with entries in [0, p), overwritten
+    :param p: prime below 2**31, or int64 array of shape (batch,) with a prime for each matrix
+    :return: int64 array of shape (batch,) of determinants modulo p
+    """
+    batch, n, _ = matrices.shape
+    if np.ndim(p) > 0:
+        p = np.asarray(p, dtype=np.int64)
+        row_p, matrix_p = p[:, None], p[:, None, None]
+    else:
+        row_p, matrix_p = p, p
+    det = np.ones(batch, dtype=np.int64)
+    batch_range = np.arange(batch)
+    for k in range(n):
+        non_zero = matrices[:, k:, k] != 0
+        pivot_rows = k + np.argmax(non_zero, axis=1)
+        singular = ~non_zero.any(axis=1)
+        det[singular] = 0
+
+        swapped = pivot_rows != k
+        det = np.where(swapped, (p - det) % p, det)
+        pivot_row = matrices[batch_range, pivot_rows].copy()
+        matrices[batch_range, pivot_rows] = matrices[:, k]
+        matrices[:, k] = pivot_row
+
+        pivots = matrices[:, k, k].copy()
+        pivots[singular] = 1
+        det = det * pivots % p
+        factors = matrices[:, k + 1:, k] * inverse_mod(pivots, p)[:, None] % row_p
+        matrices[:, k + 1:, k:] = (matrices[:, k + 1:, k:] - factors[:, :, None] * matrices[:, k, None, k:]) % matrix_p
+    return det
+
+
+def power_mod(bases, exponents, p):
+    """
+    Elementwise bases to the power exponents modulo p, for int64 arrays broadcasting together. Negative exponents
+    are powers of the inverse, so need non zero bases.
+    """
+    bases, exponents = np.broadcast_arrays(np.asarray(bases, dtype=np.int64) % p,
+                                           np.asarray(exponents, dtype=np.int64))
+    base = np.where(exponents < 0, inverse_mod(np.where(bases == 0, 1, bases), p), bases)
+    exponent = np.abs(exponents)
+    result = np.ones_like(base)
+    while exponent.any():
+        result = np.where(exponent & 1, result * base % p, result)
+        base = base * base % p
+        exponent = exponent >> 1
+    return result
+
+
+def interpolate(points, values, p, lengths=None):
+    """
+    Coefficients modulo p of the polynomial of degree below len(points) through (points[i], values[i]), by Newton's
+    divided differences, each column of the table computed as one array operation.
+    :param values: list of values, or 2D array with the values of several polynomials in its rows
+    :param lengths: with 2D values, interpolate row k through its first lengths[k] points only
+    :return: list of coefficients, lowest degree first, or list of such lists for 2D values
+    """
+    points = np.array([int(point) % p for point in points], dtype=np.int64)
+    batched = np.ndim(values) == 2
+    differences = np.asarray(values if batched else [[int(value) for value in values]], dtype=np.int64) % p
+    n = len(points)
+    lengths = np.full(len(differences), n) if lengths is None else np.asarray(lengths)
+    # the first k divided differences only depend on the first k points, so rows interpolating fewer points share
+    # the table
+    for j in range(1, n):
+        denominators = inverse_mod((points[j:] - points[:-j]) % p, p)
+        differences[:, j:] = (differences[:, j:] - differences[:, j - 1:-1]) % p * denominators % p
+
+    coefficients = np.zeros_like(differences)
+    for i in range(n - 1, -1, -1):
+        # coefficients = coefficients * (x - points[i]) + differences[i], for rows using point i
+        shifted = np.zeros_like(coefficients)
+        shifted[:, 1:] = coefficients[:, :-1]
+        shifted[:, 0] = differences[:, i]
+        coefficients = np.where((i < lengths)[:, None], (shifted - points[i] * coefficients % p) % p, coefficients)
+    if not batched:
+        return coefficients[0].tolist()
+    return [row[:length].tolist() for row, length in zip(coefficients, lengths)]
+
+
+def symmetric_residue(value, modulus):
+    value = value % modulus
+    if 2 * value > modulus:
+        value -= modulus
+    return value
+
+
+def crt(residues, moduli, new_residues, p):
+    """
+    Combines residues modulo moduli with new_residues modulo the prime p, coefficientwise.
+    :return: list of residues modulo moduli * p
+    """
+    inverse = pow(moduli % p, p - 2, p)
+    return [residue + moduli * ((int(new) - residue) * inverse % p) for residue, new in zip(residues, new_residues)]
+
+
+def reconstruct(residues_mod, max_primes=None, bound=None):
+    """
+    Chinese remaindering of integer coefficients. Without a bound, primes are added until the symmetric residues
+    stop changing. With a bound on the absolute values of the coefficients, primes are added until their product
+    exceeds twice the bound, which certifies the result.
+    :param residues_mod: function taking a prime p and returning the list of coefficients modulo p
+    :param max_primes: give up and raise ArithmeticError after this many primes
+    :param bound: int bounding the absolute value of every coefficient
+    :return: list of integer coefficients
+    """
+    p = prime(0)
+    residues = [int(residue) for residue in residues_mod(p)]
+    moduli = p
+    previous = [symmetric_residue(residue, moduli) for residue in residues]
+    k = 1
+    while True:
+        if bound is not None and moduli > 2 * bound:
+            return previous
+        if max_primes is not None and k >= max_primes:
+            raise ArithmeticError("coefficients did not stabilise after {} primes".format(max_primes))
+        p = prime(k)
+        residues = crt(residues, moduli, residues_mod(p), p)
+        moduli *= p
+        current = [symmetric_residue(residue, moduli) for residue in residues]
+        if bound is None and current == previous:
+            return current
+        previous = current
+        k += 1
+
+
+def hadamard_bound(rows):
+    """
+    Hadamard's bound on the absolute value of the determinant, the product of the euclidean norms of the rows.
+    :param rows: list of lists of the non zero int entries of each row
+    :return: int
+    """
+    bound = 1
+    for row in rows:
+        bound *= isqrt(sum(value * value for value in row)) + 1
+    return bound
+
+
+def primes_for_bound(bound):
+    """
+    :return: list of the fewest largest primes below 2**31 whose product exceeds 2 * bound
+    """
+    primes = [prime(0)]
+    product = primes[0]
+    while product <= 2 * bound:
+        primes.append(prime(len(primes)))
+        product *= primes[-1]
+    return primes
+
+
+def det_int(entries, n, max_primes=None, bound=None):
+    """
+    Determinant of an integer matrix, from determinants modulo enough primes to exceed the bound, all eliminated as
+    one stack, and Chinese remaindering.
+    :param entries: dictionary of non zero int entries, entries[(i, j)] is entry i, j
+    :param n: size of the matrix
+    :param max_primes: see reconstruct
+    :param bound: bound on the absolute value of the determinant, Hadamard's bound if None
+    :return: int
+    """
+    if bound is None:
+        rows = [[] for _ in range(n)]
+        for (i, j), value in entries.items():
+            rows[i].append(value)
+        bound = hadamard_bound(rows)
+    row_ixs = [i for i, j in entries]
+    col_ixs = [j for i, j in entries]
+    values = np.array(list(entries.values()), dtype=object)
+    primes = primes_for_bound(bound)
+    if max_primes is not None:
+        primes = primes[:max_primes]
+
+    matrices = np.zeros((len(primes), n, n), dtype=np.int64)
+    for k, p in enumerate(primes):
+        matrices[k, row_ixs, col_ixs] = (values % p).astype(np.int64)
+    residues = dict(zip(primes, det_mod(matrices, np.array(primes, dtype=np.int64))))
+    return reconstruct(lambda p: [residues[p]], max_primes=max_primes, bound=bound)[0]
+
+
+def det_laurent(entries, n, max_primes=None, bound=None):
+    """
+    Determinant of a matrix of Laurent polynomials with integer coefficients, by evaluation at several points
+    modulo several primes, determinants of the whole stack of evaluations at once, interpolation and Chinese
+    remaindering. The powers of the determinant are bounded by the lowest and highest powers in each row and in
+    each column.
+    :param entries: dictionary of non zero entries with offset and coefficients like laurent.LaurentPoly,
+    entries[(i, j)] is entry i, j
+    :param n: size of the matrix
+    :param max_primes: see reconstruct
+    :param bound: bound on the absolute values of the coefficients of the determinant, if None Hadamard's bound on
+    the unit circle, where each entry is at most the sum of the absolute values of its coefficients
+    :return: (coefficients, low), the determinant is sum(coefficients[k] t^(low + k))
+    """
+    if n == 0:
+        return [1], 0
+    # lowest and highest powers in each row and each column
+    lows = [[None] * n, [None] * n]
+    highs = [[None] * n, [None] * n]
+    norms = [[] for _ in range(n)]
+    for index, poly in entries.items():
+        high = poly.offset + len(poly.coefficients) - 1
+        for axis, i in enumerate(index):
+            lows[axis][i] = poly.offset if lows[axis][i] is None else min(lows[axis][i], poly.offset)
+            highs[axis][i] = high if highs[axis][i] is None else max(highs[axis][i], high)
+        norms[index[0]].append(sum(abs(coefficient) for coefficient in poly.coefficients))
+    if any(low is None for low in lows[0] + lows[1]):
+        return [], 0
+    low = max(sum(lows[0]), sum(lows[1]))
+    n_points = min(sum(highs[0]), sum(highs[1])) - low + 1
+    if n_points <= 0:
+        return [], 0
+    min_power = min(lows[0])
+    max_power = max(highs[0])
+    if bound is None:
+        bound = hadamard_bound(norms)
+    row_ixs = [i for i, j in entries]
+    col_ixs = [j for i, j in entries]
+
+    def residues(p):
+        points = np.arange(1, n_points + 1, dtype=np.int64)
+        inverses = inverse_mod(points, p)
+        # powers[e - min_power] = points^e modulo p
+        powers = [np.ones_like(points)]
+        for _ in range(max_power - min_power):
+            powers.append(powers[-1] * points % p)
+        base = np.ones_like(points)
+        for _ in range(-min_power if min_power < 0 else 0):
+            base = base * inverses % p
+        for _ in range(min_power if min_power > 0 else 0):
+            base = base * points % p
+        powers = [power * base % p for power in powers]
+
+        values = np.zeros((len(entries), n_points), dtype=np.int64)
+        for k, poly in enumerate(entries.values()):
+            for m, coefficient in enumerate(poly.coefficients):
+                if coefficient != 0:
+                    values[k] = (values[k] + (coefficient % p) * powers[poly.offset + m - min_power]) % p
+        matrices = np.zeros((n_points, n, n), dtype=np.int64)
+        matrices[:, row_ixs, col_ixs] = values.T
+        dets = det_mod(matrices, p)
+        # divide by t^low so that the determinant is a polynomial of degree below n_points
+        shift = np.ones_like(points)
+        for _ in range(abs(low)):
+            shift = shift * (inverses if low > 0 else points) % p
+        return interpolate(points, dets * shift % p, p)
+
+    return reconstruct(residues, max_primes=max_primes, bound=bound), low
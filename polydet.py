@@ -1,107 +1,194 @@
-from sympy import Matrix, Add
+import sys
+import os
 from itertools import permutations
 
+import sympy
+from sympy import Matrix, MatrixBase, zeros
+from sympy.abc import t
+
+sys.path.append(os.path.dirname(__file__))
+
+import sparsedet
+from laurent import LaurentPoly
+
+
+def _is_unit(poly):
+    """
+    True for the units +/- t^k of Z[t, 1/t]
+    """
+    return len(poly.coefficients) == 1 and abs(poly.coefficients[0]) == 1
+
+
+def _unit_inverse(poly):
+    return LaurentPoly(poly.coefficients, -poly.offset)
+
+
 class PolyMatrixDet:
+    """
+    Determinant of a square matrix of Laurent polynomials in t by fraction free elimination. Pivots +/- t^k are
+    used first, eliminating with exact division by a unit, which keeps the determinant of the original matrix equal
+    to factor times the determinant of mat. Once no unit is left Bareiss steps, whose divisions by the previous pivot
+    are exact, take over, and the last remaining entry is the determinant of mat when they started.
+    """
     def __init__(self, matrix=None, factor=1):
-        assert isinstance(matrix, Matrix), "matrix must be a sympy matrix object!"
-        self.mat = matrix
-        self.factor = Add(factor)
+        if isinstance(matrix, sparsedet.SparseMatrix):
+            matrix = matrix.to_dense()
+        elif isinstance(matrix, MatrixBase):
+            matrix = matrix.tolist()
+        assert isinstance(matrix, list), "matrix must be a sympy matrix, SparseMatrix or list of lists"
+        self.mat = [[LaurentPoly.from_sympy(value) for value in row] for row in matrix]
+        assert all(len(row) == len(self.mat) for row in self.mat), "matrix must be square"
+        self.factor = LaurentPoly.from_sympy(factor)
+        self.divisor = LaurentPoly((1,))
+        self.bareiss = False
 
     @property
     def rows(self):
-        return self.mat.rows
+        return len(self.mat)
 
     @property
     def cols(self):
-        return self.mat.rows
+        return len(self.mat)
 
     def __repr__(self):
-        return "PolyMatrixDet(\nmatrix={},\nfactor={})".format(self.mat.__repr__(), self.factor)
+        return "PolyMatrixDet(\nmatrix={},\nfactor={})".format(
+            [[str(value) for value in row] for row in self.mat], self.factor)
 
     def row_swap(self, i, j):
-        for k in range(0, self.mat.cols):
-            self.mat[i, k], self.mat[j, k] = self.mat[j, k], self.mat[i, k]
-        self.factor *= -1
+        self.mat[i], self.mat[j] = self.mat[j], self.mat[i]
+        self.factor = -self.factor
         return self
 
     def col_swap(self, i, j):
-        for k in range(0, self.mat.rows):
-            self.mat[k, i], self.mat[k, j] = self.mat[k, j], self.mat[k, i]
-        self.factor *= -1
+        for row in self.mat:
+            row[i], row[j] = row[j], row[i]
+        self.factor = -self.factor
         return self
 
-    def row_mult(self,i, multiple):
-        for k in range(0, self.mat.cols):
-            self.mat[i, k] *= multiple
-        self.factor = (self.factor / multiple).expand()
+    def row_mult(self, i, multiple):
+        """
+        Multiplies row i by a unit multiple, dividing the factor by it.
+        """
+        multiple = LaurentPoly.from_sympy(multiple)
+        self.mat[i] = [value * multiple for value in self.mat[i]]
+        self.factor = self.factor.exquo(multiple)
         return self
 
-    def col_mult(self,i, multiple):
-        for k in range(0, self.mat.rows):
-            self.mat[k, i] *= multiple
-        self.factor = (self.factor / multiple).expand()
+    def col_mult(self, i, multiple):
+        multiple = LaurentPoly.from_sympy(multiple)
+        for row in self.mat:
+            row[i] = row[i] * multiple
+        self.factor = self.factor.exquo(multiple)
         return self
 
     def row_add(self, i, j, multiple=1):
-        for k in range(0, self.mat.cols):
-            self.mat[i, k] = (self.mat[i, k] + multiple * self.mat[j, k]).expand()
+        multiple = LaurentPoly.from_sympy(multiple)
+        if multiple:
+            self.mat[i] = [value + multiple * other for value, other in zip(self.mat[i], self.mat[j])]
         return self
 
     def off_diag_row(self, i):
-        row = list(self.mat[i, :i]) + list(self.mat[i, i + 1:])
-        row = [item.expand() for item in row]
-        return row
+        return self.mat[i][:i] + self.mat[i][i + 1:]
 
     def off_diag_col(self, i):
-        col = list(self.mat[:i, i]) + list(self.mat[i + 1:, i])
-        col = [item.expand() for item in col]
-        return col
-
+        return [row[i] for row in self.mat[:i] + self.mat[i + 1:]]
 
     def clear_rowcol(self, i):
         remaining_row = self.off_diag_row(i)
         remaining_col = self.off_diag_col(i)
-        row_zero = all([item ==0 for item in remaining_row])
+        row_zero = all([item == 0 for item in remaining_row])
         col_zero = all([item == 0 for item in remaining_col])
         assert row_zero or col_zero, "not all zeros!"
 
-        self.factor *= self.mat[i, i]
-        self.mat.col_del(i)
-        self.mat.row_del(i)
+        self.factor *= self.mat[i][i]
+        self._delete(i)
         return self
 
+    def _delete(self, i):
+        del self.mat[i]
+        for row in self.mat:
+            del row[i]
+
+    def find_pivot(self):
+        """
+        :return: (i, j) of a unit entry if there is one, otherwise of a non zero entry of lowest degree, or None
+        """
+        best = None
+        for i, row in enumerate(self.mat):
+            for j, value in enumerate(row):
+                if value:
+                    if _is_unit(value):
+                        return i, j
+                    if best is None or value.degree() < best[0]:
+                        best = (value.degree(), i, j)
+        return None if best is None else best[1:]
+
+    def unit_step(self, i):
+        """
+        Clears column i below and above the unit mat[i][i] with exact divisions by the unit, then removes row and
+        column i.
+        """
+        pivot_row = self.mat[i]
+        inverse = _unit_inverse(pivot_row[i])
+        for k, row in enumerate(self.mat):
+            if k != i and row[i]:
+                self.row_add(k, i, multiple=-(row[i] * inverse))
+        return self.clear_rowcol(i)
+
+    def bareiss_step(self, i):
+        """
+        Fraction free step on the pivot mat[i][i], every other entry becomes
+        (pivot * entry - entry in pivot column * entry in pivot row) / previous pivot, then row and column i are
+        removed.
+        """
+        pivot_row = self.mat[i]
+        pivot = pivot_row[i]
+        for k, row in enumerate(self.mat):
+            if k == i:
+                continue
+            w = row[i]
+            for j in range(len(row)):
+                if j == i:
+                    continue
+                value = pivot * row[j]
+                if w and pivot_row[j]:
+                    value = value - w * pivot_row[j]
+                row[j] = value.exquo(self.divisor)
+        self.divisor = pivot
+        self.bareiss = True
+        self._delete(i)
+        return self
 
-def calculate_poly_det(matrix):
-    matrix = Matrix(matrix)
-    assert matrix.rows == matrix.cols
-    det = PolyMatrixDet(matrix=matrix)
-    determinant = 1
-
-    while matrix.rows > 0:
-        print("iteration")
-        print(any([item == 1 for item in det.mat[:,0]]))
-        top_val = det.mat[0,0].expand()
-        if top_val == 0:
-            rest_of_row = det.off_diag_row(0)
-            if all([item == 0 for item in rest_of_row]):
-                determinant = 0
+    def determinant(self):
+        """
+        Eliminates the whole matrix.
+        :return: the determinant as a LaurentPoly
+        """
+        while self.rows > 0:
+            pivot = self.find_pivot()
+            if pivot is None:
+                self.factor = LaurentPoly()
+                self.mat = []
                 break
+            i, j = pivot
+            if i != j:
+                self.row_swap(i, j)
+            if self.rows == 1:
+                self.clear_rowcol(0)
+            elif not self.bareiss and _is_unit(self.mat[j][j]):
+                self.unit_step(j)
             else:
-                j=0
-                while rest_of_row[j] == 0:
-                    j += 1
-                det.row_swap(0, j+1)
-                continue
+                self.bareiss_step(j)
+        return self.factor
 
-        for j in range(1,det.rows):
-            left_val = det.mat[j,0]
-            if left_val.expand() != 0:
-                det.row_add(j, 0, multiple=-left_val/top_val)
-        det.clear_rowcol(0)
-    determinant *= det.factor
-    print("done")
-    return determinant
 
+def calculate_poly_det(matrix):
+    """
+    Determinant of a matrix of Laurent polynomials in t, see PolyMatrixDet.
+    :param matrix: sympy matrix, SparseMatrix or list of lists
+    :return: sympy expression
+    """
+    return PolyMatrixDet(matrix=matrix).determinant().to_sympy()
 
 
 def decompose_poly_matrix(poly_matrix):
@@ -145,21 +232,3 @@ def _minor_sign(coords):
 def iter_minor_coords(n, m):
     for col_coords in permutations(range(m)):
         yield [[row, col] for row, col in zip(range(n), col_coords)]
-
-def calc_det(matrix):
-    def _iter_minor_coords(coords_so_far, n,m):
-        if len(coords_so_far == 11):
-            yield coords_so_far
-
-
-
-
-
-
-
-
-
-
-
-
-
@@ -4,6 +4,7 @@ from sympy.abc import t
 
 sys.path.append(os.path.dirname(__file__))
 from braid import *
+import instrument
 
 def DV(n):
     knot = ( full_twist(n) *
@@ -20,11 +21,25 @@ def tref(n):
     knot = Braid([4,3,2,5,4,3,3,4,2,3,1,-2,1,-5,-4,-6,-6]) * (-braid_range(2,n))
     return knot
 
-def twisted_braid(twists, displacements, knot_n_function, n=11):
-    knot = Braid()
+def twist_blocks(twists, displacements, n=11, as_powers=False):
+    """
+    :param as_powers: give each full twist as a pair (braid, power), the twist being braid**power
+    :return: list of the displaced full twists which twisted_braid multiplies together before knot_n_function(n)
+    """
+    blocks = []
     for twist, displacement in zip(twists,displacements):
         assert abs(twist) + displacement <= n, "too many strands!"
-        knot = knot * (empty(displacement) + full_twist(twist))
+        if as_powers:
+            blocks += [(empty(displacement) + braid_range(abs(twist)), abs(twist) if twist > 0 else -abs(twist))]
+        else:
+            blocks += [empty(displacement) + full_twist(twist)]
+    return blocks
+
+@instrument.timed
+def twisted_braid(twists, displacements, knot_n_function, n=11):
+    knot = Braid()
+    for block in twist_blocks(twists, displacements, n):
+        knot = knot * block
     knot = knot * knot_n_function(n)
     knot = knot.super_simplify()
     return knot
@@ -35,21 +50,11 @@ def twisted_braid(twists, displacements, knot_n_function, n=11):
 
 
 if __name__ == "__main__":
-    for i in range(5,11,2):
-        for i_dis in range(11-i+1):
-            for j in range(5, 11,2):
-                for j_dis in range(11 - j+1):
-                    fr = 11**2 - 9 **2 - i**2 + j**2
-                    if fr > 0:
-                        print("********")
-                        knot = twisted_braid([11,-9,-i,j], [0,2,i_dis,j_dis], figeight)
-                        
-                        
-                        print("twists: ",[11,-9, -i, j], "displaced by ",[0,2,i_dis, j_dis])
-                        obs = 4+(1/4)*fr -4
-                        print("obstruction:", 4+(1/4)*fr -4)
-                        pol = knot.alexander_poly()
-                        degree = pol.degree(t)
-                        print("degree", degree)
-                        if degree < obs:
-                            print("*****************************************success!!!!!*********************************************************")
\ No newline at end of file
+    # the sweep runs on every core and appends to the output file, rerunning resumes where it stopped
+    import sweep
+    for record in sweep.run_sweep(figeight, "figeight_sweep.jsonl", n=11):
+        print("twists: ", record["twists"], "displaced by ", record["displacements"])
+        print("obstruction:", record["obstruction"])
+        print("degree", record["degree"] if record["degree"] is not None else record["degree_bounds"])
+        if record["success"]:
+            print("*****************************************success!!!!!*********************************************************")
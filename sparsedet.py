@@ -1,4 +1,14 @@
-from copy import deepcopy
+from math import gcd
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+
+import instrument
+import modular
+from laurent import LaurentPoly
 
 
 def _index_value_dict_to_row_col_dict(index_value_dict):
@@ -86,6 +96,14 @@ class SparseMatrix:
             assert self.max_non_zero_col() < m
             self._cols = m
 
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    def copy(self):
+        row_col_dict = {row_ix: dict(row) for row_ix, row in self._row_col_dict.items()}
+        return SparseMatrix(row_col_dict, rows=self.rows, cols=self.cols)
+
     def __setitem__(self, key, value):
         assert len(key) == 2, "was expecting two indices but received {}.".format(key)
         row, col = key
@@ -181,12 +199,19 @@ class SparseMatrix:
                 + ", rows={}, cols={})".format(self.rows, self.cols))
 
     def __add__(self, other):
-        result = SparseMatrix(deepcopy(self._row_col_dict), self.rows, self.cols)
-
-        for row in other._row_col_dict:
-            for col in other._row_col_dict[row]:
-                result[row, col] = result[row, col] + other[row, col]
-        return result
+        assert self.shape == other.shape, "cannot add {} and {} matrices".format(self.shape, other.shape)
+        row_col_dict = {row_ix: dict(row) for row_ix, row in self._row_col_dict.items()}
+        for row_ix, other_row in other._row_col_dict.items():
+            row = row_col_dict.setdefault(row_ix, {})
+            for col_ix, value in other_row.items():
+                value = row.get(col_ix, 0) + value
+                if value == 0:
+                    row.pop(col_ix, None)
+                else:
+                    row[col_ix] = value
+            if not row:
+                del row_col_dict[row_ix]
+        return SparseMatrix(row_col_dict, self.rows, self.cols)
 
     def to_dense(self):
         dense_mat = []
@@ -203,15 +228,11 @@ class SparseMatrix:
 
     def __mul__(self, other):
         if isinstance(other, SparseMatrix):
-            result = SparseMatrix.zeros(self.rows, other.cols)
             assert self.cols == other.rows
-
-            for row_l in self._row_col_dict:
-                for row_r in other._row_col_dict:
-                    for col_r in other._row_col_dict[row_r]:
-                        result[row_l, col_r] += self[row_l, row_r]*other[row_r, col_r]
+            result = (self.to_csr() * other.to_csr()).to_sparse()
         else:
-            result = SparseMatrix(deepcopy(self._row_col_dict), self.rows, self.cols)
+            result = SparseMatrix({row_ix: dict(row) for row_ix, row in self._row_col_dict.items()},
+                                  self.rows, self.cols)
             for row_ix in self._row_col_dict:
                 result.row_mult(row_ix, other)
         return result
@@ -259,6 +280,697 @@ class SparseMatrix:
                 result[col_ix, row_ix] = value
         return result
 
+    def permute(self, order):
+        """
+        Symmetric permutation, entry (order[i], order[j]) of self becomes entry (i, j) of the result.
+        :param order: permutation of range(self.rows), the matrix must be square
+        :return: new SparseMatrix
+        """
+        assert self.rows == self.cols, "can only symmetrically permute a square matrix"
+        position = [0] * len(order)
+        for new_ix, old_ix in enumerate(order):
+            position[old_ix] = new_ix
+        row_col_dict = {}
+        for row_ix in order:
+            if row_ix in self._row_col_dict:
+                row_col_dict[position[row_ix]] = {position[col_ix]: value
+                                                  for col_ix, value in self._row_col_dict[row_ix].items()}
+        return SparseMatrix(row_col_dict, self.rows, self.cols)
+
+    def bandwidth(self):
+        """
+        :return: (lower, upper), the largest distance of a non zero entry below and above the diagonal
+        """
+        lower = 0
+        upper = 0
+        for row_ix, row in self._row_col_dict.items():
+            for col_ix in row:
+                lower = max(lower, row_ix - col_ix)
+                upper = max(upper, col_ix - row_ix)
+        return lower, upper
+
+    def to_csr(self):
+        row_ixs = []
+        col_ixs = []
+        values = []
+        for row_ix, row in self._row_col_dict.items():
+            for col_ix, value in row.items():
+                row_ixs += [row_ix]
+                col_ixs += [col_ix]
+                values += [value]
+        return CSRMatrix.from_coo(row_ixs, col_ixs, values, self.rows, self.cols)
+
+
+def _value_array(values):
+    """
+    int64 array if every value is a small enough int, otherwise an object array, e.g. for sympy expressions.
+    """
+    values = list(values)
+    if all(isinstance(value, (int, np.integer)) and abs(int(value)) < 2**31 for value in values):
+        return np.array(values, dtype=np.int64)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+class CSRMatrix:
+    """
+    Compressed sparse row matrix, with the same interface as SparseMatrix. Row i has column indices
+    indices[indptr[i]:indptr[i + 1]], in increasing order, and values data[indptr[i]:indptr[i + 1]]. Products,
+    sums and transposes are computed with numpy on these arrays, in time proportional to the non zero entries.
+    """
+    def __init__(self, indptr, indices, data, rows, cols):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = data
+        self.rows = rows
+        self.cols = cols
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    @classmethod
+    def from_coo(cls, row_ixs, col_ixs, values, rows, cols):
+        """
+        Builds a matrix from coordinate lists, summing repeated coordinates and dropping zeros.
+        """
+        row_ixs = np.asarray(row_ixs, dtype=np.int64)
+        col_ixs = np.asarray(col_ixs, dtype=np.int64)
+        if not isinstance(values, np.ndarray):
+            values = _value_array(values)
+        order = np.lexsort((col_ixs, row_ixs))
+        row_ixs, col_ixs, values = row_ixs[order], col_ixs[order], values[order]
+        if len(values):
+            starts = np.flatnonzero(np.r_[True, (row_ixs[1:] != row_ixs[:-1]) | (col_ixs[1:] != col_ixs[:-1])])
+            row_ixs, col_ixs = row_ixs[starts], col_ixs[starts]
+            values = np.add.reduceat(values, starts)
+            keep = values != 0
+            row_ixs, col_ixs, values = row_ixs[keep], col_ixs[keep], values[keep]
+        indptr = np.zeros(rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_ixs, minlength=rows), out=indptr[1:])
+        return cls(indptr, col_ixs, values, rows, cols)
+
+    @classmethod
+    def from_indexed_values(cls, index_value_dict, rows=None, cols=None):
+        return SparseMatrix.from_indexed_values(index_value_dict, rows, cols).to_csr()
+
+    @classmethod
+    def from_list_of_lists(cls, dense_mat, rows=None, cols=None):
+        return SparseMatrix.from_list_of_lists(dense_mat, rows, cols).to_csr()
+
+    @classmethod
+    def zeros(cls, *args):
+        return SparseMatrix.zeros(*args).to_csr()
+
+    @classmethod
+    def eye(cls, n):
+        assert isinstance(n, int), "argument of eye must be an integer"
+        return cls(np.arange(n + 1), np.arange(n), np.ones(n, dtype=np.int64), n, n)
+
+    def _row_ixs(self):
+        return np.repeat(np.arange(self.rows), np.diff(self.indptr))
+
+    def to_sparse(self):
+        row_col_dict = {}
+        for row_ix in range(self.rows):
+            start, stop = self.indptr[row_ix], self.indptr[row_ix + 1]
+            if start < stop:
+                row_col_dict[row_ix] = dict(zip(self.indices[start:stop].tolist(), self.data[start:stop].tolist()))
+        return SparseMatrix(row_col_dict, rows=self.rows, cols=self.cols)
+
+    def index_value_dict(self):
+        return self.to_sparse().index_value_dict()
+
+    def to_dense(self):
+        return self.to_sparse().to_dense()
+
+    def __str__(self):
+        return str(self.to_sparse())
+
+    def __repr__(self):
+        return ("CSRMatrix.from_list_of_lists(\n"
+                + str(self)
+                + ", rows={}, cols={})".format(self.rows, self.cols))
+
+    def _position(self, row, col):
+        assert row < self.rows and col < self.cols, "index {},{} out of range for {}x{} matrix.".format(
+            row, col, self.rows, self.cols)
+        start, stop = self.indptr[row], self.indptr[row + 1]
+        position = start + np.searchsorted(self.indices[start:stop], col)
+        return position, position < stop and self.indices[position] == col
+
+    def __getitem__(self, key):
+        row, col = key
+        if isinstance(row, (int, np.integer)) and isinstance(col, (int, np.integer)):
+            position, found = self._position(row, col)
+            return self.data[position] if found else 0
+        return self.to_sparse()[key].to_csr()
+
+    def __setitem__(self, key, value):
+        row, col = key
+        position, found = self._position(row, col)
+        if found and value != 0:
+            self._store(position, value)
+        elif found or value != 0:
+            # only row row is rewritten, see _splice_row
+            start, stop = self.indptr[row], self.indptr[row + 1]
+            indices, data = self.indices[start:stop], self.data[start:stop]
+            if found:
+                self._splice_row(row, np.delete(indices, position - start), np.delete(data, position - start))
+            else:
+                self._splice_row(row, np.insert(indices, position - start, col), np.insert(data, position - start, 0))
+                self._store(position, value)
+
+    def _store(self, position, value):
+        if self.data.dtype != object and not (isinstance(value, (int, np.integer)) and abs(int(value)) < 2**31):
+            self.data = self.data.astype(object)
+        self.data[position] = value
+
+    def transpose(self):
+        return CSRMatrix.from_coo(self.indices, self._row_ixs(), self.data, self.cols, self.rows)
+
+    def __add__(self, other):
+        assert self.shape == other.shape, "cannot add {} and {} matrices".format(self.shape, other.shape)
+        data = _concatenate(self.data, other.data)
+        if data.dtype != object and _bound(self.data) + _bound(other.data) >= 2**62:
+            data = data.astype(object)
+        return CSRMatrix.from_coo(np.r_[self._row_ixs(), other._row_ixs()], np.r_[self.indices, other.indices],
+                                  data, self.rows, self.cols)
+
+    def __iadd__(self, other):
+        result = self + other
+        self.indptr, self.indices, self.data = result.indptr, result.indices, result.data
+        return self
+
+    def __mul__(self, other):
+        if isinstance(other, CSRMatrix):
+            assert self.cols == other.rows
+            # every entry (i, k) of self meets every entry of row k of other
+            counts = np.diff(other.indptr)[self.indices]
+            row_ixs = np.repeat(self._row_ixs(), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            positions = np.repeat(other.indptr[self.indices], counts) + offsets
+            left = np.repeat(self.data, counts)
+            right = other.data[positions]
+            if left.dtype != object and right.dtype != object and \
+                    _bound(self.data) * _bound(other.data) * other.rows >= 2**62:
+                left = left.astype(object)
+            return CSRMatrix.from_coo(row_ixs, other.indices[positions], left * right, self.rows, other.cols)
+        result = CSRMatrix(self.indptr.copy(), self.indices.copy(), self.data.copy(), self.rows, self.cols)
+        return result.row_mult(slice(None), other)
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __imul__(self, other):
+        if isinstance(other, CSRMatrix):
+            return self * other
+        return self.row_mult(slice(None), other)
+
+    def dot(self, vector):
+        """
+        Matrix times vector, a numpy array or sequence of length cols.
+        """
+        vector = np.asarray(vector)
+        products = self.data * vector[self.indices]
+        result = np.zeros(self.rows, dtype=products.dtype)
+        non_empty = self.indptr[:-1] < self.indptr[1:]
+        if non_empty.any():
+            result[non_empty] = np.add.reduceat(products, self.indptr[:-1][non_empty])
+        return result
+
+    def row_mult(self, i, multiple):
+        """
+        Multiplies row i, or every row if i is slice(None), by multiple in place.
+        """
+        if isinstance(i, slice):
+            start, stop = 0, self.nnz
+        else:
+            start, stop = self.indptr[i], self.indptr[i + 1]
+        if self.data.dtype != object and not (isinstance(multiple, (int, np.integer)) and
+                                              _bound(self.data[start:stop]) * abs(int(multiple)) < 2**62):
+            self.data = self.data.astype(object)
+        self.data[start:stop] *= multiple
+        if multiple == 0:
+            self._drop_zeros()
+        return self
+
+    def _drop_zeros(self):
+        keep = self.data != 0
+        self.indptr = np.r_[0, np.cumsum(np.bincount(self._row_ixs()[keep], minlength=self.rows))]
+        self.indices, self.data = self.indices[keep], self.data[keep]
+
+    def row_add_op(self, i, j, multiple):
+        """
+        Adds multiple times row j to row i in place, merging the two sorted rows, so the arithmetic is proportional
+        to their non zero entries. Only row i is rewritten, see _splice_row.
+        """
+        assert i < self.rows and j < self.rows, "index out of range"
+        assert i != j, "cant perform row col between same rows"
+        start, stop = self.indptr[j], self.indptr[j + 1]
+        if start == stop:
+            return self
+        values = self.data[start:stop]
+        if values.dtype != object and not (isinstance(multiple, (int, np.integer)) and
+                                           _bound(values) * abs(int(multiple)) < 2**62):
+            values = values.astype(object)
+        added_indices, added = self.indices[start:stop], values * multiple
+
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        current = self.data[start:stop]
+        indices = np.union1d(self.indices[start:stop], added_indices)
+        if current.dtype != object and added.dtype != object and _bound(current) + _bound(added) >= 2**62:
+            added = added.astype(object)
+        data = np.zeros(len(indices), dtype=object if object in (current.dtype, added.dtype) else np.int64)
+        data[np.searchsorted(indices, self.indices[start:stop])] = current
+        data[np.searchsorted(indices, added_indices)] += added
+        keep = data != 0
+        if data.dtype == object and self.data.dtype != object:
+            self.data = self.data.astype(object)
+        self._splice_row(i, indices[keep], data[keep])
+        return self
+
+    def _splice_row(self, i, indices, data):
+        """
+        Replaces row i by sorted indices and data. The row is overwritten in place when its number of non zero
+        entries is unchanged, otherwise the entries after it move once.
+        """
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        if len(indices) == stop - start:
+            self.indices[start:stop] = indices
+            self.data[start:stop] = data
+            return
+        self.indices = np.concatenate([self.indices[:start], indices, self.indices[stop:]])
+        self.data = _concatenate(_concatenate(self.data[:start], data), self.data[stop:])
+        self.indptr[i + 1:] += len(indices) - (stop - start)
+
+    def swap_rows(self, i, j):
+        order = np.arange(self.rows)
+        order[i], order[j] = j, i
+        return self._take_rows(order)
+
+    def del_row(self, i):
+        assert 0 <= i < self.rows, "row index {} out of range".format(i)
+        result = CSRMatrix(self.indptr, self.indices, self.data, self.rows, self.cols)
+        result._take_rows(np.delete(np.arange(self.rows), i))
+        return result
+
+    def _take_rows(self, order):
+        starts, stops = self.indptr[order], self.indptr[np.asarray(order) + 1]
+        counts = stops - starts
+        positions = np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.indices, self.data = self.indices[positions], self.data[positions]
+        self.indptr = np.r_[0, np.cumsum(counts)]
+        self.rows = len(order)
+        return self
+
+
+def _concatenate(left, right):
+    if left.dtype == object or right.dtype == object:
+        return np.concatenate([left.astype(object), right.astype(object)])
+    return np.concatenate([left, right])
+
+
+def _bound(values):
+    """
+    Largest absolute value in an int64 array, as a python int.
+    """
+    return int(np.abs(values).max()) if len(values) else 0
+
+
+def _remove_square_content(rows, i):
+    """
+    Divides row and column i by the largest common factor h of the off diagonal entries with h^2 dividing the
+    diagonal entry, a congruence which keeps the entries integers.
+    """
+    row = rows[i]
+    h = 0
+    for j, value in row.items():
+        if j != i:
+            h = gcd(h, value)
+    diagonal = row.get(i, 0)
+    h = gcd(h, diagonal)
+    while h > 1 and diagonal % (h * h) != 0:
+        h = gcd(h, diagonal // h)
+    if h > 1:
+        for j in row:
+            if j == i:
+                row[j] //= h * h
+            else:
+                row[j] //= h
+                rows[j][i] //= h
+
+
+@instrument.timed
+def symmetric_inertia(matrix, method="band"):
+    """
+    Numbers of positive, negative and zero eigenvalues of a symmetric integer matrix, by fraction free symmetric
+    elimination. Every step is a congruence by an invertible matrix, so by Sylvester's law of inertia the signs of
+    the pivots give the inertia, and all entries stay integers.
+    :param matrix: symmetric SparseMatrix with integer entries
+    :param method: "band" to eliminate in reverse Cuthill-McKee order, keeping the fill inside the band, or
+    "markowitz" to always eliminate the sparsest row with a non zero diagonal
+    :return: (positive, negative, zero)
+    """
+    assert matrix.rows == matrix.cols, "non square matrix received"
+    if instrument.enabled:
+        instrument.matrix("sparsedet.symmetric_inertia", matrix)
+    if method == "band":
+        matrix = matrix.permute(reverse_cuthill_mckee(matrix))
+    elif method != "markowitz":
+        raise ValueError("unknown method {}, expected band or markowitz".format(method))
+    rows = {row_ix: dict(row) for row_ix, row in sorted(matrix._row_col_dict.items()) if row}
+    positive = 0
+    negative = 0
+    while rows:
+        if method == "band":
+            first = next(iter(rows))
+            if rows[first].get(first, 0) != 0:
+                candidates = [first]
+            else:
+                candidates = [row_ix for row_ix in rows[first] if rows[row_ix].get(row_ix, 0) != 0]
+        else:
+            candidates = [row_ix for row_ix, row in rows.items() if row.get(row_ix, 0) != 0]
+        if candidates:
+            pivot = min(candidates, key=lambda row_ix: len(rows[row_ix]))
+        else:
+            # zero diagonal, adding row and column j to row and column i makes the diagonal 2 * rows[i][j]
+            pivot, row = next(iter(rows.items()))
+            j = next(iter(row))
+            for col_ix, value in rows[j].items():
+                row[col_ix] = row.get(col_ix, 0) + value
+                if col_ix != pivot:
+                    rows[col_ix][pivot] = row[col_ix]
+            row[pivot] = 2 * row[j]
+            rows[j][pivot] = row[j]
+
+        neighbours = rows.pop(pivot)
+        d = neighbours.pop(pivot)
+        if d > 0:
+            positive += 1
+        else:
+            negative += 1
+
+        # row_i <- d * row_i - rows[i][pivot] * row_pivot for every neighbour i, and the same for columns
+        for i in neighbours:
+            del rows[i][pivot]
+        for i, w_i in neighbours.items():
+            row = rows[i]
+            for j in row:
+                row[j] *= d
+            for j, w_j in neighbours.items():
+                value = d * (row.get(j, 0) - w_i * w_j)
+                if value == 0:
+                    row.pop(j, None)
+                else:
+                    row[j] = value
+            for j, value in row.items():
+                if j not in neighbours:
+                    rows[j][i] = value
+        for i in neighbours:
+            if rows[i]:
+                _remove_square_content(rows, i)
+            else:
+                del rows[i]
+    return positive, negative, matrix.rows - positive - negative
+
+
+
+def _exact_div(numerator, denominator):
+    if isinstance(numerator, int):
+        return numerator // denominator
+    return numerator.exquo(denominator)
+
+
+def _pivot_size(value):
+    if isinstance(value, int):
+        return abs(value)
+    return value.degree()
+
+
+def _permutation_sign(order):
+    """
+    Sign of the permutation of range(len(order)) taking i to order[i].
+    """
+    sign = 1
+    seen = [False] * len(order)
+    for start in range(len(order)):
+        if seen[start]:
+            continue
+        length = 0
+        i = start
+        while not seen[i]:
+            seen[i] = True
+            i = order[i]
+            length += 1
+        if length % 2 == 0:
+            sign = -sign
+    return sign
+
+
+def _markowitz_determinant(matrix, one=1):
+    """
+    Determinant by sparse fraction free (Bareiss) elimination with Markowitz pivoting. Every intermediate value is
+    a minor of the matrix, so all divisions are exact. An entry left alone by step k only changes by the factor
+    pivot_k / pivot_{k-1}, so each entry stores the step it was last updated at and is rescaled when next used,
+    and each step only touches the pivot row times the pivot column.
+    """
+    assert matrix.rows == matrix.cols, "non square matrix received"
+    n = matrix.rows
+    # rows[i][j] = (value, step), cols[j] = rows with an entry in column j
+    rows = {i: {j: (value, 0) for j, value in row.items()} for i, row in matrix._row_col_dict.items() if row}
+    cols = {}
+    for i, row in rows.items():
+        for j in row:
+            cols.setdefault(j, set()).add(i)
+    if len(rows) < n or len(cols) < n:
+        return 0 * one
+
+    pivots = [one]
+    row_order = []
+    col_order = []
+
+    def current(entry):
+        value, step = entry
+        if step == len(pivots) - 1:
+            return value
+        return _exact_div(value * pivots[-1], pivots[step])
+
+    for _ in range(n):
+        if not rows:
+            return 0 * one
+        # markowitz choice, fewest (r - 1)(c - 1) updates, then the smallest pivot
+        best = None
+        for i, row in rows.items():
+            for j, entry in row.items():
+                cost = ((len(row) - 1) * (len(cols[j]) - 1), _pivot_size(entry[0]))
+                if best is None or cost < best[0]:
+                    best = (cost, i, j)
+        if best is None:
+            return 0 * one
+        _, pivot_row, pivot_col = best
+        pivot_entries = {j: current(entry) for j, entry in rows.pop(pivot_row).items()}
+        d = pivot_entries.pop(pivot_col)
+        previous = pivots[-1]
+        step = len(pivots)
+
+        for j in pivot_entries:
+            cols[j].discard(pivot_row)
+        for i in cols.pop(pivot_col):
+            if i == pivot_row:
+                continue
+            row = rows[i]
+            w_i = current(row.pop(pivot_col))
+            for j, w_j in pivot_entries.items():
+                if j in row:
+                    value = _exact_div(d * current(row[j]) - w_i * w_j, previous)
+                else:
+                    value = _exact_div(-w_i * w_j, previous)
+                if value == 0:
+                    row.pop(j, None)
+                    cols[j].discard(i)
+                else:
+                    row[j] = (value, step)
+                    cols[j].add(i)
+            if not row:
+                return 0 * one
+        if any(not cols[j] for j in pivot_entries):
+            return 0 * one
+        pivots.append(d)
+        row_order.append(pivot_row)
+        col_order.append(pivot_col)
+
+    return _permutation_sign(row_order) * _permutation_sign(col_order) * pivots[-1]
+
+
+
+def reverse_cuthill_mckee(matrix):
+    """
+    Reverse Cuthill-McKee ordering of the symmetrised sparsity pattern. Each connected component is searched breadth
+    first from a vertex of minimal degree, visiting neighbours in increasing degree, which keeps every entry close
+    to the diagonal.
+    :param matrix: square SparseMatrix
+    :return: list order, with order[i] the index placed at position i, see SparseMatrix.permute
+    """
+    assert matrix.rows == matrix.cols, "non square matrix received"
+    neighbours = [set() for _ in range(matrix.rows)]
+    for row_ix, row in matrix._row_col_dict.items():
+        for col_ix in row:
+            if col_ix != row_ix:
+                neighbours[row_ix].add(col_ix)
+                neighbours[col_ix].add(row_ix)
+    degree = [len(adjacent) for adjacent in neighbours]
+
+    order = []
+    visited = [False] * matrix.rows
+    for root in sorted(range(matrix.rows), key=degree.__getitem__):
+        if visited[root]:
+            continue
+        visited[root] = True
+        head = len(order)
+        order.append(root)
+        while head < len(order):
+            vertex = order[head]
+            head += 1
+            for neighbour in sorted(neighbours[vertex], key=degree.__getitem__):
+                if not visited[neighbour]:
+                    visited[neighbour] = True
+                    order.append(neighbour)
+    return order[::-1]
+
+
+def banded_determinant(matrix, one=1):
+    """
+    Determinant by fraction free (Bareiss) elimination in a dense band, with row pivoting inside the band. Rows not
+    updated by step k only change by the factor pivot_k / pivot_{k-1}, so each row stores the step it was last
+    updated at and is rescaled when next used. Takes O(n * lower * (lower + upper)) operations.
+    :param matrix: square SparseMatrix, ideally already in a bandwidth reducing order
+    :param one: multiplicative identity of the entries, see determinant
+    :return: the determinant, of the same type as the entries
+    """
+    assert matrix.rows == matrix.cols, "non square matrix received"
+    n = matrix.rows
+    zero = 0 * one
+    lower, upper = matrix.bandwidth()
+    # row i holds the columns start, start + 1, ..., start + len(values) - 1
+    band = []
+    for row_ix in range(n):
+        row = matrix._row_col_dict.get(row_ix)
+        if not row:
+            return zero
+        start = min(row)
+        values = [zero] * (max(row) + 1 - start)
+        for col_ix, value in row.items():
+            values[col_ix - start] = value
+        band.append((start, values))
+    stamps = [0] * n
+    pivots = [one]
+    sign = 1
+
+    def current(i):
+        start, values = band[i]
+        if stamps[i] == len(pivots) - 1:
+            return start, values
+        return start, [_exact_div(value * pivots[-1], pivots[stamps[i]]) for value in values]
+
+    for k in range(n):
+        best = None
+        for i in range(k, min(n, k + lower + 1)):
+            start, values = band[i]
+            if start <= k < start + len(values) and values[k - start] != 0:
+                size = _pivot_size(values[k - start])
+                if best is None or size < best[0]:
+                    best = (size, i)
+        if best is None:
+            return zero
+        i = best[1]
+        if i != k:
+            band[i], band[k] = band[k], band[i]
+            stamps[i], stamps[k] = stamps[k], stamps[i]
+            sign = -sign
+
+        start, values = current(k)
+        pivot_row = values[k - start:]
+        d = pivot_row[0]
+        previous = pivots[-1]
+        for i in range(k + 1, min(n, k + lower + 1)):
+            start, values = band[i]
+            if not (start <= k < start + len(values) and values[k - start] != 0):
+                continue
+            start, values = current(i)
+            row = values[k - start:]
+            w = row[0]
+            length = max(len(row), len(pivot_row))
+            row += [zero] * (length - len(row))
+            updated = [zero] * (length - 1)
+            for j in range(1, length):
+                value = d * row[j]
+                if j < len(pivot_row):
+                    value -= w * pivot_row[j]
+                updated[j - 1] = _exact_div(value, previous)
+            band[i] = (k + 1, updated)
+            stamps[i] = k + 1
+        pivots.append(d)
+    return sign * pivots[-1]
+
+
+def _modular_determinant(matrix, one=1):
+    """
+    Determinant modulo several primes with Chinese remaindering, see modular.det_int and modular.det_laurent.
+    """
+    assert matrix.rows == matrix.cols, "non square matrix received"
+    entries = {index: value for index, value in matrix.index_value_dict().items() if value != 0}
+    if isinstance(one, LaurentPoly):
+        entries = {index: LaurentPoly((value,)) if isinstance(value, int) else value
+                   for index, value in entries.items()}
+        coefficients, low = modular.det_laurent(entries, matrix.rows)
+        return LaurentPoly(coefficients, low)
+    if matrix.rows == 0:
+        return one
+    return modular.det_int(entries, matrix.rows)
+
+
+# smallest size at which matrices without a narrow band default to the modular backend
+_MODULAR_MIN_SIZE = 24
+
+
+@instrument.timed
+def determinant(matrix, one=1, method=None):
+    """
+    Determinant by exact elimination.
+    :param matrix: square SparseMatrix or CSRMatrix with int entries, LaurentPoly entries, or sympy Poly entries
+    :param one: multiplicative identity of the entries, e.g. LaurentPoly((1,)) for Laurent polynomial matrices
+    :param method: "band" for fraction free banded elimination after a reverse Cuthill-McKee reordering, which
+    suits the nearly banded Seifert matrices of long braids, "markowitz" for general sparse fraction free
+    elimination, "modular" for elimination modulo several primes with Chinese remaindering (int or LaurentPoly
+    entries only), or None to use "modular" for large matrices whose bandwidth stays above a quarter of their size
+    and "band" otherwise
+    :return: the determinant, of the same type as the entries
+    """
+    if isinstance(matrix, CSRMatrix):
+        matrix = matrix.to_sparse()
+    if method is None or method == "band":
+        matrix = matrix.permute(reverse_cuthill_mckee(matrix))
+        if method is None:
+            method = "band"
+            if (matrix.rows >= _MODULAR_MIN_SIZE and max(matrix.bandwidth()) > matrix.rows // 4
+                    and isinstance(one, (int, LaurentPoly))):
+                method = "modular"
+    if instrument.enabled:
+        instrument.matrix("sparsedet.determinant", matrix)
+        instrument.count("sparsedet.determinant." + method)
+    if method == "band":
+        return banded_determinant(matrix, one=one)
+    elif method == "markowitz":
+        return _markowitz_determinant(matrix, one=one)
+    elif method == "modular":
+        return _modular_determinant(matrix, one=one)
+    raise ValueError("unknown method {}, expected band, markowitz or modular".format(method))
 
 
 
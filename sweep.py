@@ -0,0 +1,216 @@
+import sys
+import os
+import json
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+from sympy.abc import t
+
+sys.path.append(os.path.dirname(__file__))
+
+import cache
+import instrument
+import invariants
+import search
+from braid import Braid
+from burautree import BurauTree
+
+
+def twist_space(n=11):
+    """
+    Parameters of the search in search.py, twists [n, -n + 2, -i, j] displaced by [0, 2, i_dis, j_dis], for odd i and
+    j from 5 to n - 1 and every displacement which fits, keeping only those with positive obstruction.
+    :return: generator of (twists, displacements)
+    """
+    for i in range(5, n, 2):
+        for i_dis in range(n - i + 1):
+            for j in range(5, n, 2):
+                for j_dis in range(n - j + 1):
+                    twists = [n, -n + 2, -i, j]
+                    if obstruction(twists) > 0:
+                        yield twists, [0, 2, i_dis, j_dis]
+
+
+def obstruction(twists):
+    """
+    Obstruction of the twisted braid, a quarter of the signed sum of the squares of the twists
+    """
+    return sum(twist * abs(twist) for twist in twists) / 4
+
+
+# Burau matrices of products of twist blocks already computed in this process, by family and number of strands
+_trees = {}
+
+
+@instrument.timed
+def _shared_burau(family, n, twists, displacements):
+    """
+    Unsimplified twisted braid and its Burau matrix from the trie of products of its twist blocks, which is shared
+    by every candidate of the family.
+    :return: (braid, burau), see invariants.burau_coefficients
+    """
+    blocks = search.twist_blocks(twists, displacements, n, as_powers=True)
+    suffix = getattr(search, family)(n)
+    if (family, n) not in _trees:
+        _trees[family, n] = BurauTree(max(n, suffix.n_strands))
+    tree = _trees[family, n]
+    knot = Braid(n_strands=tree.n_strands)
+    for block, power in blocks:
+        knot = knot * block**power
+    knot = knot * suffix
+    return knot, tree.product(blocks, suffix)
+
+
+def _task_key(family, n, twists, displacements):
+    return json.dumps([family, n, list(twists), list(displacements)])
+
+
+def evaluate(family, n, twists, displacements, staged=True):
+    """
+    Builds one twisted braid and compares the degree of its Alexander polynomial with the obstruction.
+    :param family: name of a family function in search, such as "figeight", "tref" or "DV"
+    :param staged: decide with invariants.alexander_degree_below, which only computes the whole polynomial when
+    cheaper bounds cannot decide, rather than always computing it. The braid is then left unsimplified, as its
+    Burau matrix comes from the products of twist blocks shared with earlier candidates, see BurauTree.
+    :return: dictionary record of the parameters, length of the braid evaluated, degree (None if only bounded),
+    bounds on the degree, the stage which decided, obstruction and timings
+    """
+    start = time.perf_counter()
+    if staged:
+        knot, burau = _shared_burau(family, n, twists, displacements)
+    else:
+        knot = search.twisted_braid(twists, displacements, getattr(search, family), n)
+    braid_seconds = time.perf_counter() - start
+    obs = obstruction(twists)
+    start = time.perf_counter()
+    if staged:
+        # also shared between processes using the same cache file
+        name = "alexander_degree_below:{}".format(obs)
+        success, lower, upper, stage = cache.default_cache.cached(
+            name, knot.word_key, lambda: invariants.alexander_degree_below(knot, obs, burau=burau))
+    else:
+        alex_poly = knot.alexander_poly(method="interp")
+        degree = float("-inf") if alex_poly.is_zero else alex_poly.degree(t)
+        success, lower, upper, stage = degree < obs, degree, degree, "full"
+    alexander_seconds = time.perf_counter() - start
+    return {"key": _task_key(family, n, twists, displacements),
+            "family": family, "n": n, "twists": list(twists), "displacements": list(displacements),
+            "length": len(knot), "degree": lower if lower == upper else None, "degree_bounds": [lower, upper],
+            "stage": stage, "obstruction": obs, "success": success,
+            "seconds": {"braid": braid_seconds, "alexander": alexander_seconds}}
+
+
+def _evaluate_chunk(chunk):
+    """
+    :return: (records, snapshot) with snapshot the instrumentation of the chunk, None when disabled
+    """
+    records = [evaluate(*task) for task in chunk]
+    if not instrument.enabled:
+        return records, None
+    snapshot = instrument.snapshot()
+    instrument.reset()
+    return records, snapshot
+
+
+def _initialise_worker(maxsize, cache_path, instrumented):
+    cache.configure(maxsize=maxsize, path=cache_path)
+    if instrumented:
+        instrument.enable()
+
+
+def _chunks(tasks, chunk_size):
+    tasks = iter(tasks)
+    while True:
+        chunk = list(islice(tasks, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _encode_record(record):
+    # JSON has no infinity, the -inf bounds of the zero polynomial are written as null
+    lower, upper = [None if bound == float("-inf") else bound for bound in record["degree_bounds"]]
+    record = dict(record, degree=lower if lower == upper else None, degree_bounds=[lower, upper])
+    return json.dumps(record, allow_nan=False)
+
+
+def _decode_record(line):
+    record = json.loads(line)
+    lower, upper = [float("-inf") if bound is None else bound for bound in record["degree_bounds"]]
+    record.update(degree=lower if lower == upper else None, degree_bounds=[lower, upper])
+    return record
+
+
+def read_records(output):
+    """
+    Records of a sweep output file, as returned by evaluate, ignoring a last line cut short by an interruption.
+    :return: generator of records
+    """
+    if not os.path.exists(output):
+        return
+    with open(output) as file:
+        for line in file:
+            try:
+                yield _decode_record(line)
+            except (ValueError, KeyError, TypeError):
+                continue
+
+
+def completed_keys(output):
+    """
+    Keys of the records already in a sweep output file, see read_records.
+    """
+    return {record["key"] for record in read_records(output)}
+
+
+def run_sweep(family, output, parameters=None, n=11, processes=None, chunk_size=4, resume=True, staged=True,
+              cache_path=None):
+    """
+    Evaluates every parameter set on a process pool and appends one JSON record per line to output, flushed as
+    results arrive, so the output file is also the checkpoint. Parameters are consumed lazily and sent to the
+    workers in chunks, and with resume, parameters whose records are already in output are skipped.
+    :param family: family function in search, or its name, such as figeight, tref or DV
+    :param output: path of the JSONL output file
+    :param parameters: iterable of (twists, displacements), twist_space(n) if None
+    :param n: number of strands
+    :param processes: number of worker processes, os.cpu_count() if None, 1 to run in this process
+    :param chunk_size: number of parameter sets per task sent to a worker
+    :param resume: skip parameters with a record in output
+    :param staged: see evaluate
+    :param cache_path: SQLite file for cache.configure, shared by the workers and kept between runs
+    :return: list of the new records, and with instrument enabled the timings and counters of the workers are
+    merged into those of this process
+    """
+    if not isinstance(family, str):
+        family = family.__name__
+    if parameters is None:
+        parameters = twist_space(n)
+    done = completed_keys(output) if resume else set()
+    tasks = ((family, n, twists, displacements, staged) for twists, displacements in parameters
+             if _task_key(family, n, twists, displacements) not in done)
+    chunks = _chunks(tasks, chunk_size)
+
+    if cache_path is not None:
+        cache.configure(path=cache_path)
+
+    records = []
+    with open(output, "a") as file:
+        def write(result):
+            chunk_records, snapshot = result
+            if snapshot is not None:
+                instrument.merge(snapshot)
+            for record in chunk_records:
+                file.write(_encode_record(record) + "\n")
+            file.flush()
+            records.extend(chunk_records)
+
+        if processes == 1:
+            for chunk in chunks:
+                write(_evaluate_chunk(chunk))
+        else:
+            initargs = (cache.default_cache.maxsize, cache_path, instrument.enabled)
+            with Pool(processes, initializer=_initialise_worker, initargs=initargs) as pool:
+                for result in pool.imap_unordered(_evaluate_chunk, chunks):
+                    write(result)
+    return records
@@ -0,0 +1,80 @@
+import sys
+import os
+import io
+import random
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import braidfile
+from braid import Braid
+
+
+def _random_braids(count, n_strands=11, seed=0):
+    rng = random.Random(seed)
+    return [Braid([rng.choice((-1, 1)) * rng.randrange(1, n_strands) for _ in range(rng.randrange(0, 20))],
+                  n_strands=n_strands) for _ in range(count)]
+
+
+def _same(first, second):
+    return [(list(braid), braid.n_strands) for braid in first] == \
+        [(list(braid), braid.n_strands) for braid in second]
+
+
+def test_text_round_trip(tmp_path):
+    braids = _random_braids(1000)
+    path = str(tmp_path / "braids.txt")
+    assert braidfile.write_text(path, braids) == len(braids)
+    assert _same(braidfile.read_text(path, 11), braids)
+    inferred = list(braidfile.read_text(path))
+    assert [braid.n_strands for braid in inferred] == [braid.max_generator() + 1 for braid in braids]
+
+
+def test_text_formats():
+    text = "{1;-2}\n\n{}\n 3, 4"
+    assert _same(braidfile.read_text(io.StringIO(text)),
+                 [Braid([1, -2], 3), Braid([], 0), Braid([3, 4], 5)])
+
+
+def test_blank_chunk():
+    # the second chunk of lines is blank
+    text = "{1;2}\n" + "\n" * (2 * braidfile._CHUNK) + "{-3}\n"
+    assert _same(braidfile.read_text(io.StringIO(text)), [Braid([1, 2], 3), Braid([-3], 4)])
+
+
+@pytest.mark.parametrize("text, n_strands, message", [
+    ("1;2\n\n40000\n", None, "line 3"),
+    ("1;2\n5\n", 4, "line 2"),
+    ("1;x\n", None, "line 1"),
+    ("1;0;2\n", None, "line 1"),
+])
+def test_text_errors(text, n_strands, message):
+    with pytest.raises(ValueError, match=message):
+        list(braidfile.read_text(io.StringIO(text), n_strands))
+
+
+def test_binary_round_trip(tmp_path):
+    braids = _random_braids(1000) + [Braid([], 3)]
+    path = str(tmp_path / "braids.bin")
+    assert braidfile.write_binary(path, braids) == len(braids)
+    with braidfile.BraidFile(path) as file:
+        assert len(file) == len(braids)
+        assert _same(file, braids)
+        assert _same([file[123], file[-1]], [braids[123], braids[-1]])
+        assert _same(file[10:40:7], braids[10:40:7])
+
+
+def test_binary_bad_generator(tmp_path):
+    path = str(tmp_path / "braids.bin")
+    braidfile.write_binary(path, [Braid([1, 2], 3), Braid([1, 2], 3)])
+    with open(path, "r+b") as file:
+        # last letter of the second braid
+        file.seek(len(braidfile._MAGIC) + 2 * braidfile._RECORD.size + 3)
+        file.write(bytes([5]))
+    with braidfile.BraidFile(path) as file:
+        assert list(file[0]) == [1, 2]
+        with pytest.raises(ValueError, match="braid 1"):
+            file[1]
+        with pytest.raises(ValueError, match="braid 1"):
+            list(file)
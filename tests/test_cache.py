@@ -0,0 +1,29 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import cache
+from braid import Braid
+
+
+def test_disabled_cache_skips_key():
+    calls = []
+    disabled = cache.InvariantCache(maxsize=0)
+    assert disabled.cached("name", lambda: calls.append(1), lambda: 5) == 5
+    assert not calls and disabled.info()["misses"] == 1
+
+
+def test_invariants_cached_by_word(tmp_path):
+    previous = cache.default_cache
+    try:
+        cache.configure(maxsize=16, path=str(tmp_path / "cache.sqlite"))
+        braid = Braid([1, 1, 1])
+        assert braid.signature() == -2 and Braid([1, 1, 1]).signature() == -2
+        assert cache.cache_info()["hits"] == 1
+        # the Garside key is never needed
+        assert braid._key is None
+        cache.configure(maxsize=0, path=str(tmp_path / "cache.sqlite"))
+        assert Braid([1, 1, 1]).signature() == -2 and cache.cache_info()["disk_hits"] == 1
+    finally:
+        cache.default_cache = previous
@@ -0,0 +1,36 @@
+import sys
+import os
+import random
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from sparsedet import CSRMatrix
+
+
+def test_row_add_op_overflow():
+    matrix = CSRMatrix.from_list_of_lists([[1, 0], [2**30, 3]], 2, 2)
+    matrix.row_add_op(0, 1, 2**40)
+    assert matrix.to_dense() == [[1 + 2**70, 3 * 2**40], [2**30, 3]]
+    matrix = CSRMatrix.from_list_of_lists([[1, 0], [2**30, 3]], 2, 2)
+    matrix.row_add_op(0, 1, 2**70)
+    assert matrix.to_dense() == [[1 + 2**100, 3 * 2**70], [2**30, 3]]
+
+
+def test_row_operations_match_dense():
+    rng = random.Random(0)
+    for _ in range(200):
+        rows, cols = rng.randint(2, 6), rng.randint(1, 6)
+        dense = [[rng.choice([0, 0, 0, 1, -2, 5, 2**40]) for _ in range(cols)] for _ in range(rows)]
+        matrix = CSRMatrix.from_list_of_lists(dense, rows, cols)
+        for _ in range(10):
+            if rng.random() < 0.5:
+                i, j = rng.sample(range(rows), 2)
+                multiple = rng.choice([0, 1, -1, 3, 2**40])
+                matrix.row_add_op(i, j, multiple)
+                dense[i] = [left + multiple * right for left, right in zip(dense[i], dense[j])]
+            else:
+                i, j, value = rng.randrange(rows), rng.randrange(cols), rng.choice([0, 0, 7, -1, 2**50])
+                matrix[i, j] = value
+                dense[i][j] = value
+            assert matrix.to_dense() == dense
+            assert (matrix.data != 0).all() and matrix.indptr[-1] == len(matrix.indices) == len(matrix.data)
@@ -0,0 +1,68 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from braid import Braid, full_twist
+
+
+def test_more_than_256_strands():
+    n = 300
+    assert Braid([299, 1, -299], n) == Braid([1], n)
+    assert hash(Braid([299, 1, -299], n)) == hash(Braid([1], n))
+    assert Braid([298, 299, 298], n) == Braid([299, 298, 299], n)
+    assert Braid([298], n) != Braid([299], n)
+
+
+def _half_twist(n):
+    return Braid([gen for top in range(n - 1, 0, -1) for gen in range(1, top + 1)], n)
+
+
+def _assert_equal(first, second):
+    assert first == second
+    assert hash(first) == hash(second)
+
+
+def test_braid_relations():
+    n = 5
+    for i in range(1, n - 1):
+        _assert_equal(Braid([i, i + 1, i], n), Braid([i + 1, i, i + 1], n))
+        _assert_equal(Braid([-i, -i - 1, -i], n), Braid([-i - 1, -i, -i - 1], n))
+    for i in range(1, n):
+        for j in range(i + 2, n):
+            _assert_equal(Braid([i, j], n), Braid([j, i], n))
+            _assert_equal(Braid([i, -j], n), Braid([-j, i], n))
+    _assert_equal(Braid([1, 2, -1, -2, 2, 1], n), Braid([1, 2], n))
+
+
+def test_conjugation():
+    n = 5
+    delta = _half_twist(n)
+    for i in range(1, n):
+        _assert_equal(delta * Braid([i], n) * delta.inverse(), Braid([n - i], n))
+    conjugator = Braid([2, -3, 1, 4, 4], n)
+    braid = Braid([1, -2, 3, 3, -4], n)
+    _assert_equal(conjugator * braid * conjugator.inverse() * conjugator, conjugator * braid)
+    _assert_equal(conjugator.inverse() * (conjugator * braid * conjugator.inverse()) * conjugator, braid)
+
+
+def test_delta_powers():
+    n = 5
+    delta = _half_twist(n)
+    twist = full_twist(n)
+    _assert_equal(delta ** 2, twist)
+    _assert_equal(delta ** -2, twist.inverse())
+    _assert_equal(delta ** 4, twist ** 2)
+    _assert_equal(delta * delta.inverse(), Braid([], n))
+    for i in range(1, n):
+        _assert_equal(twist * Braid([i], n), Braid([i], n) * twist)
+
+
+def test_distinct_words():
+    n = 4
+    pairs = [([1, 2], [2, 1]), ([1], [-1]), ([1, 2, 1], [2, 1, 1]), ([1, 3], [1, 2]), ([1, 1], []),
+             ([1, 2, 3, 1, 2, 3, 1, 2, 3, 1, 2], [1, 2, 3, 1, 2, 3, 1, 2, 3, 1, 2, 3])]
+    for first, second in pairs:
+        assert Braid(first, n) != Braid(second, n)
+        assert Braid(first, n).canonical_key() != Braid(second, n).canonical_key()
+    assert Braid([1], 3) != Braid([1], 4)
@@ -0,0 +1,61 @@
+import sys
+import os
+import random
+
+import sympy
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import modular
+import sparsedet
+from laurent import LaurentPoly
+
+
+def _random_entries(rng, n, size, density=0.6):
+    return {(i, j): rng.choice((-1, 1)) * rng.randint(1, size)
+            for i in range(n) for j in range(n) if rng.random() < density}
+
+
+def test_det_int_matches_bareiss():
+    rng = random.Random(0)
+    for size in (5, 2**20, 2**40, 2**80):
+        for n in (1, 3, 6, 12):
+            entries = _random_entries(rng, n, size)
+            matrix = sparsedet.SparseMatrix.from_indexed_values(entries, n, n)
+            expected = sparsedet.banded_determinant(matrix)
+            assert expected == sparsedet.determinant(matrix, method="markowitz")
+            assert modular.det_int(entries, n) == expected
+
+
+def test_det_int_beyond_one_prime():
+    # diagonal entries just below a prime, so the determinant needs many primes
+    n = 8
+    entries = {(i, i): 2**31 - 1 - i for i in range(n)}
+    entries.update({(i, i + 1): 2**35 for i in range(n - 1)})
+    matrix = sparsedet.SparseMatrix.from_indexed_values(entries, n, n)
+    expected = sparsedet.banded_determinant(matrix)
+    assert abs(expected) > modular.prime(0) ** 4
+    assert modular.det_int(entries, n) == expected
+    dense = sympy.Matrix(matrix.to_dense())
+    assert expected == dense.det(method="bareiss")
+
+
+def test_det_int_singular():
+    entries = {(0, 0): 2**40, (0, 1): 2**41, (1, 0): 3, (1, 1): 6}
+    assert modular.det_int(entries, 2) == 0
+
+
+def test_det_laurent_matches_bareiss():
+    rng = random.Random(1)
+    one = LaurentPoly((1,))
+    for size in (3, 2**36):
+        for n in (1, 2, 4, 6):
+            entries = {}
+            for (i, j), _ in _random_entries(rng, n, 1).items():
+                entries[i, j] = LaurentPoly([rng.randint(-size, size) for _ in range(rng.randint(1, 3))],
+                                            rng.randint(-2, 2))
+            entries = {index: poly for index, poly in entries.items() if poly.coefficients}
+            matrix = sparsedet.SparseMatrix.from_indexed_values(entries, n, n)
+            expected = sparsedet.banded_determinant(matrix, one=one)
+            coefficients, low = modular.det_laurent(entries, n)
+            assert LaurentPoly(coefficients, low) == expected
@@ -0,0 +1,30 @@
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from braid import Braid
+import search
+
+
+def _dense_signature(braid):
+    matrix = braid.seifert_matrix()
+    form = np.array(matrix.to_dense(), dtype=float)
+    eigenvalues = np.linalg.eigvalsh(form + form.T)
+    return int((eigenvalues > 1e-9).sum() - (eigenvalues < -1e-9).sum())
+
+
+def test_trefoil_signature():
+    assert Braid([1, 1, 1]).signature() == -2
+    assert Braid([-1, -1, -1]).signature() == 2
+
+
+def test_figure_eight_signature():
+    assert Braid([1, -2, 1, -2]).signature() == 0
+
+
+def test_family_signature_matches_dense():
+    for braid in (search.figeight(7), search.tref(7)):
+        assert braid.signature() == _dense_signature(braid)
@@ -0,0 +1,36 @@
+import sys
+import os
+import json
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import sweep
+
+
+def _strict_loads(text):
+    def reject(constant):
+        raise ValueError("non standard JSON constant {}".format(constant))
+    return json.loads(text, parse_constant=reject)
+
+
+def test_infinite_bounds_round_trip(tmp_path):
+    record = {"key": "k", "degree": float("-inf"), "degree_bounds": [float("-inf"), float("-inf")]}
+    line = sweep._encode_record(record)
+    assert _strict_loads(line)["degree_bounds"] == [None, None]
+    output = tmp_path / "sweep.jsonl"
+    output.write_text(line + "\n" + sweep._encode_record(dict(record, key="j", degree_bounds=[float("-inf"), 4]))
+                      + "\n")
+    records = list(sweep.read_records(str(output)))
+    assert records[0]["degree_bounds"] == [float("-inf"), float("-inf")] and records[0]["degree"] == float("-inf")
+    assert records[1]["degree_bounds"] == [float("-inf"), 4] and records[1]["degree"] is None
+    assert sweep.completed_keys(str(output)) == {"k", "j"}
+
+
+def test_sweep_output_is_standard_json(tmp_path):
+    output = str(tmp_path / "sweep.jsonl")
+    parameters = [([7, -5, -5, 5], [0, 2, 1, 0]), ([7, -5, -5, 5], [0, 2, 2, 0])]
+    records = sweep.run_sweep("figeight", output, parameters, n=7, processes=1)
+    with open(output) as file:
+        lines = [_strict_loads(line) for line in file]
+    assert [line["key"] for line in lines] == [record["key"] for record in records]
+    assert sweep.run_sweep("figeight", output, parameters, n=7, processes=1) == []
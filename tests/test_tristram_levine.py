@@ -0,0 +1,34 @@
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from braid import Braid
+import search
+
+
+def test_trefoil_jumps_at_root():
+    # the Alexander polynomial of the trefoil vanishes at exp(i pi / 3)
+    omegas = np.exp(1j * np.array([0.1, np.pi / 3, 2.0, np.pi]))
+    assert list(Braid([1, 1, 1]).tristram_levine(omegas)) == [0, -1, -2, -2]
+
+
+def test_figure_eight_vanishes():
+    omegas = np.exp(1j * np.linspace(0.1, np.pi, 7))
+    assert not Braid([1, -2, 1, -2]).tristram_levine(omegas).any()
+
+
+def test_minus_one_is_signature():
+    for braid in (search.figeight(7), search.tref(7)):
+        assert braid.tristram_levine([-1])[0] == braid.signature()
+
+
+def test_split_links():
+    # split links have a vanishing Alexander polynomial and no jump points
+    omegas = np.exp(1j * np.linspace(0.1, np.pi, 5))
+    assert not Braid([1, -1], 2).tristram_levine(omegas).any()
+    assert not Braid([1, 3], 4).tristram_levine(omegas).any()
+    # split union of a Hopf link and a trefoil, the trefoil jumping at exp(i pi / 3)
+    assert list(Braid([1, 1, 3, 3, 3], 4).tristram_levine(omegas)) == [-1, -1, -3, -3, -3]
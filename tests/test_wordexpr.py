@@ -0,0 +1,53 @@
+import sys
+import os
+import random
+from array import array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import wordexpr
+from braid import Braid, empty
+
+
+def _eager(node):
+    # reference flattening through leaves and transform, one level of recursion per power
+    word = []
+    for leaf, shift, inverse, mirror in wordexpr.leaves(node):
+        letters = list(leaf.word) if isinstance(leaf, wordexpr.Word) else _eager(leaf.child) * leaf.power
+        word += wordexpr.transform(letters, shift, inverse, mirror)
+    return word
+
+
+def test_flatten_matches_leaves():
+    rng = random.Random(0)
+    nodes = [wordexpr.Word(array("h", [rng.choice((-1, 1)) * rng.randint(1, 4) for _ in range(rng.randint(0, 4))]))
+             for _ in range(3)]
+    for _ in range(40):
+        first, second = rng.choice(nodes), rng.choice(nodes)
+        nodes += [rng.choice([lambda: wordexpr.concat(first, second),
+                              lambda: wordexpr.power(first, rng.randint(-3, 3)),
+                              lambda: wordexpr.Inverse(first),
+                              lambda: wordexpr.Mirror(first),
+                              lambda: wordexpr.shift(first, rng.randint(0, 3))])()]
+    for node in nodes:
+        word = node.flatten()
+        assert list(word) == _eager(node)
+        assert len(word) == node.length
+        assert node.max_generator == max((abs(gen) for gen in word), default=-1)
+        assert node.exponent_sum() == sum(1 if gen > 0 else -1 for gen in word)
+
+
+def test_deep_expression():
+    braid = Braid([1, -2], 3)
+    word = [1, -2]
+    depth = 3 * sys.getrecursionlimit()
+    for i in range(depth):
+        if i % 2:
+            braid, word = -braid, [-gen for gen in word]
+        else:
+            braid, word = braid**-1, [-gen for gen in reversed(word)]
+    braid = empty(2) + braid * braid
+    word = [gen + 2 if gen > 0 else gen - 2 for gen in word * 2]
+    assert len(braid) == len(word) and braid.max_generator() == 4
+    assert list(braid) == word
+    assert braid.alexander_poly(method="interp") == Braid(word, 5).alexander_poly(method="interp")
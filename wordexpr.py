@@ -0,0 +1,216 @@
+from array import array
+
+import numpy as np
+
+# same storage as braid words, signed 16 bit generators
+_TYPECODE = "h"
+
+
+class Node:
+    """
+    Lazy braid word, a DAG of concatenations, powers, inverses, mirror images and strand shifts of explicit words.
+    Every node knows its length, largest generator and number of negative letters without building the word, which
+    flatten only does when asked.
+    """
+    __slots__ = ("length", "max_generator", "n_negative")
+
+    def exponent_sum(self):
+        return self.length - 2 * self.n_negative
+
+    def flatten(self):
+        """
+        :return: the word as an array of generators
+        """
+        return array(_TYPECODE, _flatten(self).astype(np.int16).tobytes())
+
+
+class Word(Node):
+    __slots__ = ("word",)
+
+    def __init__(self, word):
+        """
+        :param word: array of generators, which must not be changed afterwards
+        """
+        self.word = word
+        self.length = len(word)
+        values = np.frombuffer(word, dtype=np.int16) if len(word) else np.zeros(0, dtype=np.int16)
+        self.max_generator = int(np.abs(values).max()) if len(word) else -1
+        self.n_negative = int((values < 0).sum())
+
+
+class Concat(Node):
+    __slots__ = ("parts",)
+
+    def __init__(self, parts):
+        self.parts = tuple(parts)
+        self.length = sum(part.length for part in self.parts)
+        self.max_generator = max((part.max_generator for part in self.parts), default=-1)
+        self.n_negative = sum(part.n_negative for part in self.parts)
+
+
+class Power(Node):
+    __slots__ = ("child", "power")
+
+    def __init__(self, child, power):
+        assert power >= 0, "negative powers are powers of the inverse"
+        self.child = child
+        self.power = power
+        self.length = child.length * power
+        self.max_generator = child.max_generator if power else -1
+        self.n_negative = child.n_negative * power
+
+
+class Inverse(Node):
+    __slots__ = ("child",)
+
+    def __init__(self, child):
+        self.child = child
+        self.length = child.length
+        self.max_generator = child.max_generator
+        self.n_negative = child.length - child.n_negative
+
+
+class Mirror(Node):
+    """
+    Every generator replaced by its inverse, in the same order
+    """
+    __slots__ = ("child",)
+
+    def __init__(self, child):
+        self.child = child
+        self.length = child.length
+        self.max_generator = child.max_generator
+        self.n_negative = child.length - child.n_negative
+
+
+class Shift(Node):
+    """
+    Every generator moved shift strands up
+    """
+    __slots__ = ("child", "shift")
+
+    def __init__(self, child, shift):
+        self.child = child
+        self.shift = shift
+        self.length = child.length
+        self.max_generator = child.max_generator + shift if child.length else -1
+        self.n_negative = child.n_negative
+
+
+def concat(*nodes):
+    """
+    Concatenation of nodes, keeping concatenations flat and dropping empty words
+    """
+    parts = []
+    for node in nodes:
+        if isinstance(node, Concat):
+            parts += node.parts
+        elif node.length:
+            parts += [node]
+    if len(parts) == 1:
+        return parts[0]
+    return Concat(parts)
+
+
+def power(node, exponent):
+    if exponent < 0:
+        node, exponent = Inverse(node), -exponent
+    if exponent == 1:
+        return node
+    return Power(node, exponent)
+
+
+def shift(node, strands):
+    if strands == 0 or not node.length:
+        return node
+    if isinstance(node, Shift):
+        return Shift(node.child, node.shift + strands)
+    return Shift(node, strands)
+
+
+def leaves(node, shift=0, inverse=False, mirror=False):
+    """
+    Explicit words of the DAG in order, with the strand shift and whether to invert and mirror each, powers being
+    repeated. Shifts, inverses and mirror images commute with each other, so are pushed down to the words.
+    :return: generator of (node, shift, inverse, mirror), node a Word or a Power
+    """
+    stack = [(node, shift, inverse, mirror)]
+    while stack:
+        node, shift, inverse, mirror = stack.pop()
+        if isinstance(node, (Word, Power)):
+            yield node, shift, inverse, mirror
+        elif isinstance(node, Concat):
+            parts = node.parts if inverse else node.parts[::-1]
+            stack += [(part, shift, inverse, mirror) for part in parts]
+        elif isinstance(node, Inverse):
+            stack += [(node.child, shift, not inverse, mirror)]
+        elif isinstance(node, Mirror):
+            stack += [(node.child, shift, inverse, not mirror)]
+        elif isinstance(node, Shift):
+            stack += [(node.child, shift + node.shift, inverse, mirror)]
+        else:
+            raise TypeError("unknown node {}".format(type(node)))
+
+
+def transform(word, shift=0, inverse=False, mirror=False):
+    """
+    :param word: sequence of generators
+    :return: list of the generators shifted, inverted and mirrored as in leaves
+    """
+    word = [gen + shift if gen > 0 else gen - shift for gen in word]
+    if mirror:
+        word = [-gen for gen in word]
+    if inverse:
+        word = [-gen for gen in reversed(word)]
+    return word
+
+
+def _flatten(node):
+    """
+    The word of node as an int64 numpy array, walking the DAG with an explicit stack as in leaves, so deep
+    expressions do not recurse. Each power is flattened once per shift, inverse and mirror, and then tiled.
+    """
+    segments, powers = [], {}
+    stack = [(node, 0, False, False)]
+    while stack:
+        node, shift, inverse, mirror = stack.pop()
+        if isinstance(node, _Tile):
+            segment = np.concatenate(segments[node.start:] + [np.zeros(0, dtype=np.int64)])
+            del segments[node.start:]
+            powers[node.key] = np.tile(segment, node.power)
+            segments += [powers[node.key]]
+        elif isinstance(node, Word):
+            word = np.frombuffer(node.word, dtype=np.int16).astype(np.int64)
+            word = np.where(word > 0, word + shift, word - shift)
+            if mirror != inverse:
+                word = -word
+            segments += [word[::-1] if inverse else word]
+        elif isinstance(node, Power):
+            key = (id(node), shift, inverse, mirror)
+            if key in powers:
+                segments += [powers[key]]
+            else:
+                # the child is flattened above the marker on the stack, then tiled when the marker is reached
+                stack += [(_Tile(key, node.power, len(segments)), shift, inverse, mirror),
+                          (node.child, shift, inverse, mirror)]
+        elif isinstance(node, Concat):
+            parts = node.parts if inverse else node.parts[::-1]
+            stack += [(part, shift, inverse, mirror) for part in parts]
+        elif isinstance(node, Inverse):
+            stack += [(node.child, shift, not inverse, mirror)]
+        elif isinstance(node, Mirror):
+            stack += [(node.child, shift, inverse, not mirror)]
+        elif isinstance(node, Shift):
+            stack += [(node.child, shift + node.shift, inverse, mirror)]
+        else:
+            raise TypeError("unknown node {}".format(type(node)))
+    return np.concatenate(segments + [np.zeros(0, dtype=np.int64)])
+
+
+class _Tile:
+    __slots__ = ("key", "power", "start")
+
+    def __init__(self, key, power, start):
+        self.key = key
+        self.power = power
+        self.start = start